@@ -0,0 +1,68 @@
+"""Searching every code when they do not all fit in the memory budget.
+
+Serves --codes copies of a processed code with a memory budget of about
+--fit codes, runs search_code over every code, and reports the latency,
+how many times codes were built and the most memory held by loaded codes.
+Exits with status 1 if codes are rebuilt by the queries or the loaded
+codes exceed the budget.
+
+Usage:
+    python benchmarks/bench_budget.py --json_path data/output/code_penal.json --codes 3 --fit 1.5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "services"))
+from bench_search import QUERIES
+from server import CodeServer
+from src.code_registry import CodeRegistry, LoadedCode
+from src.query_cache import QueryCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark searches over codes exceeding the memory budget")
+    parser.add_argument("--json_path", default="data/output/code_penal.json")
+    parser.add_argument("--codes", type=int, default=3)
+    parser.add_argument("--fit", type=float, default=1.5, help="Budget, in number of codes")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    size = LoadedCode("probe", "probe", args.json_path).size_bytes
+    budget_mb = args.fit * size / (1024 * 1024)
+    sources = {f"copy{i}": (f"Copy {i}", args.json_path) for i in range(args.codes)}
+    registry = CodeRegistry(sources, memory_budget_mb=budget_mb)
+    server = CodeServer(registry, QueryCache(0), tool_workers=0)
+
+    loads = 0
+    load = registry._load
+
+    def counting_load(name):
+        nonlocal loads
+        loads += 1
+        return load(name)
+
+    registry._load = counting_load
+    latencies = []
+    most_loaded = 0
+    for _ in range(args.repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            server.search_code(query, fields=[])
+            latencies.append(time.perf_counter() - start)
+            most_loaded = max(most_loaded, sum(code.size_bytes for code in registry.loaded.values()))
+
+    print(f"{args.codes} codes of {size / 1e6:.1f} MB, budget {budget_mb:.1f} MB: "
+          f"{len(latencies)} searches, p50 {statistics.median(latencies) * 1000:.2f} ms, "
+          f"max {max(latencies) * 1000:.0f} ms; {loads} code loads; "
+          f"at most {most_loaded / 1e6:.1f} MB loaded")
+    if loads > args.codes or most_loaded > max(budget_mb * 1024 * 1024, size):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Wall-clock comparison of serial and process-pool PDF extraction.
+
+Usage:
+    python benchmarks/bench_extraction.py --workers 1 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.pdf_text_extractor import PdfTextExtractor
+
+PDFS = ["data/input/code_penal.pdf", "data/input/code_assurances.pdf"]
+
+
+def run(pdf_path, workers, out_dir):
+    txt_path = os.path.join(out_dir, f"{os.path.basename(pdf_path)}.{workers}.txt")
+    extractor = PdfTextExtractor(pdf_path, txt_path, workers=workers)
+    start = time.perf_counter()
+    text = extractor.extract_text()
+    return time.perf_counter() - start, text, len(extractor.page_offsets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction")
+    parser.add_argument("--pdfs", nargs="+", default=PDFS)
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for pdf_path in args.pdfs:
+            baseline_seconds = baseline_text = None
+            for workers in args.workers:
+                seconds, text, pages = run(pdf_path, workers, out_dir)
+                if baseline_text is None:
+                    baseline_seconds, baseline_text = seconds, text
+                identical = "identical" if text == baseline_text else "DIFFERENT"
+                print(f"{os.path.basename(pdf_path):24} workers={workers:<3} pages={pages:<5} "
+                      f"{seconds:7.2f} s  {baseline_seconds / seconds:5.2f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Latency of the reference graph queries behind the server's graph tools.
+
+Builds the CSR graph from a processed JSON code, checks that its citing
+articles match the referenced_by lists of the output, then times k-hop
+expansion, shortest paths and the most-cited rankings over every article.
+
+Usage:
+    python benchmarks/bench_graph.py --json_path data/output/code_penal.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.reference_graph import ReferenceGraph
+
+
+def timed(label, calls, func):
+    start = time.perf_counter()
+    for args in calls:
+        func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:28} {elapsed / len(calls) * 1000:8.3f} ms per query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reference graph queries")
+    parser.add_argument("--json_path", default="data/output/code_penal.json")
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(args.json_path, "r", encoding="utf-8") as f:
+        articles = json.load(f)["articles"]
+    article_ids = [article["article_id"] for article in articles]
+
+    start = time.perf_counter()
+    graph = ReferenceGraph.build(article_ids, [article["references"] for article in articles])
+    print(f"Built graph of {graph.num_nodes} articles, {len(graph.out_indices)} citations "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "code.graph.npz")
+        graph.save(path)
+        start = time.perf_counter()
+        graph = ReferenceGraph.load(path)
+        print(f"Loaded {os.path.getsize(path) / 1e3:.1f} kB in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    # Articles sharing an id may cite each other, which referenced_by cannot show.
+    mismatches = sum(
+        {article_ids[d] for d in graph.citing(i)} - {article["article_id"]}
+        != set(article["referenced_by"]) - {article["article_id"]}
+        for i, article in enumerate(articles)
+    )
+    print(f"citing articles differing from referenced_by: {mismatches}")
+
+    rng = random.Random(0)
+    docs = [rng.randrange(graph.num_nodes) for _ in range(args.samples)]
+    pairs = [(rng.randrange(graph.num_nodes), rng.randrange(graph.num_nodes)) for _ in range(args.samples)]
+    for hops in (1, 2, 3):
+        timed(f"neighbours, {hops} hop(s)", [(d, hops) for d in docs], graph.neighbours)
+    timed("shortest path, directed", [(s, t, True) for s, t in pairs], graph.shortest_path)
+    timed("shortest path, undirected", [(s, t, False) for s, t in pairs], graph.shortest_path)
+    timed("most cited, in-degree", [(10, "in_degree")] * 100, graph.most_cited)
+    timed("most cited, pagerank", [(10, "pagerank")] * 100, graph.most_cited)
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Keyword stage benchmarks: candidate extraction backends, then scoring.
+
+Scoring compares the former running-IDF loop with the two-pass KeywordScorer
+on candidates from a plain regex tokenizer, and shuffles the corpus to show
+which implementation depends on document order. Backends whose resources are
+missing (e.g. NLTK data) are reported and skipped.
+
+Usage:
+    python benchmarks/bench_keywords.py --json_path data/output/code_penal.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+from collections import defaultdict
+from math import log
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.candidate_extractors import CANDIDATE_EXTRACTORS, make_candidate_extractor
+from src.keyword_scorer import KeywordScorer
+
+WORD_RE = re.compile(r"\w{3,}")
+
+
+def running_idf_keywords(candidate_lists, top_n=5):
+    """Scoring as ArticleProcessor.extract_keywords did it, one article at a time."""
+    word_doc_freq = defaultdict(int)
+    keywords = []
+    for num_docs, candidates in enumerate(candidate_lists, start=1):
+        for word in set(candidates):
+            word_doc_freq[word] += 1
+        word_freq = defaultdict(int)
+        for word in candidates:
+            word_freq[word] += 1
+        tfidf_scores = {}
+        for word, freq in word_freq.items():
+            tf = freq / max(len(candidates), 1)
+            idf = log(num_docs / (word_doc_freq[word] + 1)) + 1
+            tfidf_scores[word] = tf * idf
+        sorted_keywords = sorted(tfidf_scores.items(), key=lambda x: x[1], reverse=True)
+        keywords.append([word for word, score in sorted_keywords[:top_n]])
+    return keywords
+
+
+def two_pass_keywords(candidate_lists, top_n=5):
+    scorer = KeywordScorer()
+    for candidates in candidate_lists:
+        scorer.add(candidates)
+    return scorer.top_keywords(top_n)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword scoring")
+    parser.add_argument("--json_path", default="data/output/code_penal.json")
+    parser.add_argument("--replicate", type=int, default=10, help="Repeat the corpus to enlarge it")
+    args = parser.parse_args()
+
+    with open(args.json_path, "r", encoding="utf-8") as f:
+        articles = json.load(f)["articles"]
+    for backend in CANDIDATE_EXTRACTORS:
+        try:
+            extractor = make_candidate_extractor(backend, [])
+            _, seconds = timed(lambda: [extractor.extract(article["content"]) for article in articles])
+        except (ImportError, LookupError) as e:
+            print(f"{backend:>6} candidates: skipped ({type(e).__name__})")
+            continue
+        print(f"{backend:>6} candidates: {seconds:7.3f} s for {len(articles)} articles")
+
+    candidate_lists = [WORD_RE.findall(article["content"].lower()) for article in articles] * args.replicate
+    print(f"{len(candidate_lists)} documents, {sum(map(len, candidate_lists))} candidates")
+
+    legacy, legacy_seconds = timed(running_idf_keywords, candidate_lists)
+    two_pass, two_pass_seconds = timed(two_pass_keywords, candidate_lists)
+    print(f"running IDF loop: {legacy_seconds:7.3f} s")
+    print(f"two-pass scorer:  {two_pass_seconds:7.3f} s  ({legacy_seconds / two_pass_seconds:.1f}x faster)")
+
+    order = list(range(len(candidate_lists)))
+    random.Random(0).shuffle(order)
+    shuffled = [candidate_lists[i] for i in order]
+    legacy_shuffled = running_idf_keywords(shuffled)
+    two_pass_shuffled = two_pass_keywords(shuffled)
+    legacy_changed = sum(legacy[i] != legacy_shuffled[j] for j, i in enumerate(order))
+    two_pass_changed = sum(two_pass[i] != two_pass_shuffled[j] for j, i in enumerate(order))
+    print(f"documents whose keywords change after shuffling: running IDF {legacy_changed}, two-pass {two_pass_changed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Load test of the MCP server over SSE with many simulated clients.
+
+Starts services/server.py once per --tool_workers value, connects
+--clients concurrent sessions that call search_code in a loop for
+--seconds, and reports the throughput and latency. A separate client
+pings the cheap list_codes tool meanwhile, showing how long the event
+loop keeps requests waiting. Then compares fetching the articles cited by
+an article one search_code call at a time with one get_articles call.
+
+Finally serves two copies of the code under a tiny memory budget, so that
+a client alternating between them makes every call rebuild a code, and
+measures how long list_codes waits meanwhile: this is what --tool_workers
+is for, since searches themselves hold the GIL.
+
+Usage:
+    python benchmarks/bench_load.py --json_path data/output/code_penal.json --clients 32 --tool_workers 0 8
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_search import QUERIES
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(source_args, port, tool_workers):
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "services", "server.py"), "--server_type", "sse",
+         *source_args, "--port", str(port), "--tool_workers", str(tool_workers),
+         "--query_cache_size", "0", "--watch_interval", "0"],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        env=dict(os.environ, LOG_LEVEL="WARNING"),
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("The server did not start")
+
+
+def percentile_ms(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1000
+
+
+async def client(url, queries, deadline, latencies):
+    async with sse_client(url) as streams, ClientSession(*streams) as session:
+        await session.initialize()
+        for query in itertools.cycle(queries):
+            if time.perf_counter() >= deadline:
+                return
+            start = time.perf_counter()
+            await session.call_tool("search_code", {"query": query, "max_results": 10})
+            latencies.append(time.perf_counter() - start)
+
+
+async def pinger(url, deadline, latencies):
+    async with sse_client(url) as streams, ClientSession(*streams) as session:
+        await session.initialize()
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await session.call_tool("list_codes", {})
+            latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.05)
+
+
+async def reloader(url, codes, deadline, latencies):
+    async with sse_client(url) as streams, ClientSession(*streams) as session:
+        await session.initialize()
+        for code in itertools.cycle(codes):
+            if time.perf_counter() >= deadline:
+                return
+            start = time.perf_counter()
+            await session.call_tool("search_code", {"query": "vol", "code": code, "fields": []})
+            latencies.append(time.perf_counter() - start)
+
+
+async def cited_lookup(url, article_id):
+    """Milliseconds to fetch (up to 15 of) the articles cited by an article, one by one and in one call."""
+    async with sse_client(url) as streams, ClientSession(*streams) as session:
+        await session.initialize()
+        result = await session.call_tool("search_code", {"query": article_id, "max_results": 1, "fields": ["references"]})
+        ids = list(dict.fromkeys(json.loads(result.content[0].text)["articles"][0]["references"]))[:15]
+        start = time.perf_counter()
+        for article_id in ids:
+            await session.call_tool("search_code", {"query": article_id, "max_results": 1})
+        one_by_one = time.perf_counter() - start
+        start = time.perf_counter()
+        await session.call_tool("get_articles", {"ids": ids})
+        batched = time.perf_counter() - start
+    return len(ids), one_by_one * 1000, batched * 1000
+
+
+async def run(url, clients, seconds):
+    # Connect every client before starting the clock.
+    deadline = time.perf_counter() + seconds + 2
+    latencies, pings = [], []
+    tasks = [client(url, QUERIES[i % len(QUERIES):] + QUERIES[:i % len(QUERIES)], deadline, latencies)
+             for i in range(clients)]
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(pinger(url, deadline, pings), *tasks)
+    return latencies, pings, time.perf_counter() - start
+
+
+async def run_reloads(url, codes, seconds):
+    deadline = time.perf_counter() + seconds
+    reloads, pings = [], []
+    await asyncio.gather(pinger(url, deadline, pings), reloader(url, codes, deadline, reloads))
+    return reloads, pings
+
+
+def write_copies(json_path, config_dir, count=2):
+    """Write configs serving count copies of a code, and return their names."""
+    names = []
+    for i in range(count):
+        names.append(f"copy{i}")
+        with open(os.path.join(config_dir, f"copy{i}.json"), "w", encoding="utf-8") as f:
+            json.dump({"code_name": f"Copy {i}", "json_path": json_path}, f)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the MCP server")
+    parser.add_argument("--json_path", default="data/output/code_penal.json")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tool_workers", nargs="+", type=int, default=[0, 8])
+    parser.add_argument("--cited_article", default="Article 131-26-2", help="Article whose citations are fetched")
+    args = parser.parse_args()
+
+    for tool_workers in args.tool_workers:
+        port = free_port()
+        server = start_server(["--json_path", os.path.abspath(args.json_path)], port, tool_workers)
+        url = f"http://127.0.0.1:{port}/sse"
+        try:
+            # Load the code before measuring.
+            asyncio.run(cited_lookup(url, args.cited_article))
+            latencies, pings, elapsed = asyncio.run(run(url, args.clients, args.seconds))
+            count, one_by_one_ms, batched_ms = asyncio.run(cited_lookup(url, args.cited_article))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"tool_workers={tool_workers:<3} {args.clients} clients: {len(latencies) / elapsed:7.1f} searches/s, "
+              f"p50 {percentile_ms(latencies, 0.5):6.1f} ms, p95 {percentile_ms(latencies, 0.95):6.1f} ms; "
+              f"list_codes p50 {statistics.median(pings) * 1000:5.1f} ms, max {max(pings) * 1000:6.1f} ms; "
+              f"{count} cited articles: {one_by_one_ms:.0f} ms one by one, {batched_ms:.0f} ms with get_articles")
+
+    for tool_workers in args.tool_workers:
+        port = free_port()
+        with tempfile.TemporaryDirectory() as config_dir:
+            codes = write_copies(os.path.abspath(args.json_path), config_dir)
+            server = start_server(["--configs", os.path.join(config_dir, "*.json"), "--memory_budget_mb", "1"],
+                                  port, tool_workers)
+            try:
+                reloads, pings = asyncio.run(run_reloads(f"http://127.0.0.1:{port}/sse", codes, args.seconds))
+            finally:
+                server.terminate()
+                server.wait()
+        print(f"tool_workers={tool_workers:<3} while codes reload: {len(reloads)} calls of "
+              f"{statistics.median(reloads) * 1000:.0f} ms; list_codes p50 {statistics.median(pings) * 1000:5.1f} ms, "
+              f"max {max(pings) * 1000:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Peak memory of the JSON output versus the streamed JSONL output.
+
+Runs the pipeline once per output format, each in a fresh interpreter
+without the pipeline cache (peak RSS growth is measured from after the
+imports and a first read of the raw text), then opens each output with open_article_store
+and reads every article back. Peak RSS is reported by each child itself.
+
+Usage:
+    python benchmarks/bench_output.py --config configs/code_assurances.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROCESS_CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from src.code_processor import CodeProcessor
+
+def peak_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+processor = CodeProcessor(json.loads({config!r}), use_cache=False)
+with open(processor.txt_path, "r", encoding="utf-8") as f:
+    f.read()
+base = peak_mb()
+start = time.perf_counter()
+processor.process()
+print(json.dumps({{"seconds": time.perf_counter() - start, "base_mb": base, "peak_mb": peak_mb()}}))
+"""
+
+LOAD_CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from src.article_store import open_article_store
+
+def peak_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+base = peak_mb()
+start = time.perf_counter()
+store = open_article_store({path!r})
+open_seconds = time.perf_counter() - start
+for i in range(len(store)):
+    store.article(i)
+print(json.dumps({{"open_ms": open_seconds * 1000, "base_mb": base, "peak_mb": peak_mb()}}))
+"""
+
+
+def run_child(code):
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True, cwd=ROOT
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark output formats")
+    parser.add_argument("--config", default="configs/code_assurances.json")
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    config["summary"] = {"enabled": False}
+    config["packed_path"] = None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'format':6} {'process s':>9} {'process +peak MB':>16} {'size MB':>8} {'open ms':>8} {'read +peak MB':>13}")
+        for output_format in ("json", "jsonl"):
+            config["output_format"] = output_format
+            config["json_path"] = os.path.join(tmp_dir, f"code.{output_format}")
+            processed = run_child(PROCESS_CHILD.format(root=ROOT, config=json.dumps(config)))
+            loaded = run_child(LOAD_CHILD.format(root=ROOT, path=config["json_path"]))
+            size = os.path.getsize(config["json_path"])
+            print(f"{output_format:6} {processed['seconds']:9.1f} {processed['peak_mb'] - processed['base_mb']:16.1f} {size / 1e6:8.2f} "
+                  f"{loaded['open_ms']:8.1f} {loaded['peak_mb'] - loaded['base_mb']:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
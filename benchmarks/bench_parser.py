@@ -0,0 +1,75 @@
+"""Regression check and timing for the streaming hierarchy parser.
+
+For every config, runs split_by_articles + detect_hierarchy (legacy) and
+HierarchyParser.iter_articles (streaming) on the cleaned raw text, fails with
+exit status 1 if their (article_id, content, hierarchy) outputs differ, and
+prints the time taken by each.
+
+Usage:
+    python benchmarks/bench_parser.py --configs configs/code_penal.json configs/code_assurances.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.hierarchy_parser import HierarchyParser
+from src.text_cleaner import TextCleaner
+
+
+def legacy_splits(parser, text):
+    articles_id, articles_content, preceding_texts = parser.split_by_articles(text)
+    splits = []
+    prev_hierarchy = {lvl: "" for lvl in parser.level_keys}
+    for i, article_id in enumerate(articles_id):
+        curr_hierarchy = parser.detect_hierarchy(preceding_texts[i], prev_hierarchy)
+        splits.append((article_id, articles_content[i], curr_hierarchy))
+        prev_hierarchy = curr_hierarchy.copy()
+    return splits
+
+
+def first_difference(expected, actual):
+    for i, (left, right) in enumerate(zip(expected, actual)):
+        if left != right:
+            return i, left[0], right[0]
+    return min(len(expected), len(actual)), None, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare legacy and streaming hierarchy parsing")
+    parser.add_argument("--configs", nargs="+", default=sorted(glob.glob("configs/*.json")))
+    args = parser.parse_args()
+
+    failures = 0
+    for config_path in args.configs:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if not os.path.exists(config["txt_path"]):
+            print(f"{config_path}: skipped, {config['txt_path']} not extracted yet")
+            continue
+        with open(config["txt_path"], "r", encoding="utf-8") as f:
+            text = TextCleaner(config["cleaning_patterns"]).clean_text(f.read())
+        hierarchy_parser = HierarchyParser(config["hierarchy_patterns"], config["level_keys"], config["article_pattern"])
+
+        start = time.perf_counter()
+        expected = legacy_splits(hierarchy_parser, text)
+        legacy_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = list(hierarchy_parser.iter_articles(text))
+        streaming_seconds = time.perf_counter() - start
+
+        status = "identical"
+        if expected != actual:
+            failures += 1
+            index, legacy_id, streaming_id = first_difference(expected, actual)
+            status = f"DIFFERENT at article {index} ({legacy_id} / {streaming_id})"
+        print(f"{config_path}: {len(expected)} articles, legacy {legacy_seconds:.3f} s, "
+              f"streaming {streaming_seconds:.3f} s, {status}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
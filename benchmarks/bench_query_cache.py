@@ -0,0 +1,58 @@
+"""End-to-end search_code latency with and without the query cache, and
+response sizes for full articles versus ids with snippets.
+
+Usage:
+    python benchmarks/bench_query_cache.py --json_path data/output/code_penal.json
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "services"))
+from bench_search import QUERIES
+from server import CodeServer
+from src.code_registry import CodeRegistry
+from src.query_cache import QueryCache
+
+
+def median_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the search_code query cache")
+    parser.add_argument("--json_path", default="data/output/code_penal.json")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    registry = CodeRegistry.from_path(args.json_path)
+    uncached = CodeServer(registry, QueryCache(max_entries=0))
+    cached = CodeServer(registry, QueryCache())
+    registry.get(registry.names()[0])
+
+    print(f"{'query':40} {'uncached ms':>11} {'cached ms':>9} {'full KB':>8} {'snippets KB':>11}")
+    totals = [0.0, 0.0, 0, 0]
+    for query in QUERIES:
+        uncached_ms = median_ms(lambda: uncached.search_code(query), args.repeat)
+        cached.search_code(query)
+        cached_ms = median_ms(lambda: cached.search_code(query.upper() + " "), args.repeat)
+        full = len(uncached.search_code(query).encode("utf-8"))
+        snippets = len(uncached.search_code(query, fields=[], snippet_chars=200).encode("utf-8"))
+        for i, value in enumerate((uncached_ms, cached_ms, full, snippets)):
+            totals[i] += value
+        print(f"{query[:40]:40} {uncached_ms:11.3f} {cached_ms:9.3f} {full / 1e3:8.1f} {snippets / 1e3:11.1f}")
+    print(f"\n{'total':40} {totals[0]:11.3f} {totals[1]:9.3f} {totals[2] / 1e3:8.1f} {totals[3] / 1e3:11.1f}")
+    print(f"cache: {cached.query_cache.hits} hits, {cached.query_cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
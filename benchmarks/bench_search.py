@@ -0,0 +1,83 @@
+"""Compare search latency of the inverted index against the original linear scan.
+
+Usage:
+    python benchmarks/bench_search.py --json_path data/output/code_penal.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.search_index import SearchIndex
+
+QUERIES = [
+    "Article 121-3",
+    "Article R625-1",
+    "222-1",
+    "escroquerie",
+    "responsabilité pénale",
+    "personne morale",
+    "réclusion criminelle à perpétuité",
+    "mise en danger de la vie d'autrui",
+    "assurance maritime",
+    "xylophone",
+]
+
+
+def linear_scan(articles, query, max_results=10):
+    """The search loop CodeServer used before the index existed."""
+    results = []
+    query_lower = query.lower().strip()
+    for article in articles:
+        if (query_lower == article["article_id"].lower() or
+            article["article_id"].lower() in query_lower or
+            query_lower in article["article_id"].lower() or
+            query_lower in article["content"].lower()):
+            results.append(article["article_id"])
+            if len(results) >= max_results:
+                break
+    return results
+
+
+def time_calls(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search_code implementations")
+    parser.add_argument("--json_path", default="data/output/code_penal.json")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max_results", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.json_path, "r", encoding="utf-8") as f:
+        articles = json.load(f)["articles"]
+
+    start = time.perf_counter()
+    index = SearchIndex([a["article_id"] for a in articles], (a["content"] for a in articles),
+                        references=(a["references"] for a in articles))
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(articles)} articles, {len(index.postings)} terms, index built in {build_ms:.1f} ms\n")
+
+    print(f"{'query':40} {'scan ms':>9} {'index ms':>9} {'speedup':>8}  hits")
+    scan_total = index_total = 0.0
+    for query in QUERIES:
+        scan_ms = time_calls(lambda: linear_scan(articles, query, args.max_results), args.repeat)
+        index_ms = time_calls(lambda: index.search(query, args.max_results), args.repeat)
+        scan_total += scan_ms
+        index_total += index_ms
+        hits = len(index.search(query, args.max_results))
+        print(f"{query[:40]:40} {scan_ms:9.3f} {index_ms:9.3f} {scan_ms / max(index_ms, 1e-9):7.1f}x  {hits}")
+    print(f"\n{'total':40} {scan_total:9.3f} {index_total:9.3f} {scan_total / max(index_total, 1e-9):7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Latency of semantic search on a code scaled to 10k+ articles.
+
+The articles of a processed code are repeated (with their words shuffled
+in each copy, so copies differ) until --articles is reached. The script
+embeds them with the hashing vectorizer, writes and memory-maps the
+float32 matrix, then reports the latency of single and batched top-k
+cosine queries, and of hybrid fusion with the lexical ranking.
+
+Usage:
+    python benchmarks/bench_semantic.py --json_path data/output/code_penal.json --articles 20000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.embeddings import EmbeddingIndex, HashingEmbedder, write_embeddings
+from src.search_index import SearchIndex
+
+QUERIES = [
+    "qui paie après un accident de voiture",
+    "indemnisation des victimes d'accidents de la circulation",
+    "résiliation du contrat par l'assuré",
+    "peine encourue pour un vol avec violence",
+    "responsabilité pénale des personnes morales",
+    "délai de prescription de l'action",
+    "obligation de déclarer un sinistre",
+    "catastrophe naturelle",
+]
+RRF_K = 60
+
+
+def scaled_contents(contents, count, seed=0):
+    rng = random.Random(seed)
+    scaled = list(contents)
+    while len(scaled) < count:
+        words = contents[len(scaled) % len(contents)].split()
+        rng.shuffle(words)
+        scaled.append(" ".join(words))
+    return scaled[:count]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.95) - 1] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark semantic search latency")
+    parser.add_argument("--json_path", default="data/output/code_penal.json")
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with open(args.json_path, "r", encoding="utf-8") as f:
+        contents = [article["content"] for article in json.load(f)["articles"]]
+    contents = scaled_contents(contents, args.articles)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_path = os.path.join(tmp_dir, "code.json")
+        start = time.perf_counter()
+        write_embeddings(data_path, lambda: iter(contents), len(contents), HashingEmbedder(args.dim))
+        embed_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        index = EmbeddingIndex.load(data_path)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(f"{len(contents)} articles x {args.dim} dims: embedded in {embed_seconds:.1f} s "
+              f"({len(contents) / embed_seconds:.0f} articles/s), "
+              f"{index.matrix.nbytes / 1e6:.0f} MB matrix mapped in {load_ms:.1f} ms")
+
+        lexical = SearchIndex([str(i) for i in range(len(contents))], contents)
+        # Touch the mapped pages once so the timings do not include disk reads.
+        float(index.matrix.sum())
+
+        single, hybrid = [], []
+        for _ in range(args.repeat):
+            for query in QUERIES:
+                start = time.perf_counter()
+                index.search(query, args.k)
+                single.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                fused = {}
+                rankings = ([doc for doc, _ in index.search(query, 50)], [hit.doc for hit in lexical.search(query, 50)])
+                for ranking in rankings:
+                    for rank, doc in enumerate(ranking):
+                        fused[doc] = fused.get(doc, 0.0) + 1.0 / (RRF_K + rank + 1)
+                sorted(fused, key=fused.get, reverse=True)[:args.k]
+                hybrid.append(time.perf_counter() - start)
+
+        batched = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.search_many(QUERIES, args.k)
+            batched.append((time.perf_counter() - start) / len(QUERIES))
+
+        for label, samples in (("semantic, one query", single), ("semantic, batch of %d" % len(QUERIES), batched),
+                               ("hybrid (RRF)", hybrid)):
+            p50, p95 = percentiles(samples)
+            print(f"{label:24} p50 {p50:7.2f} ms  p95 {p95:7.2f} ms per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Startup time and memory of the JSON output versus the packed (.lcpk) format.
+
+Each measurement runs in a fresh interpreter so peak RSS is not shared.
+The JSON file is converted to a temporary packed file first.
+
+Usage:
+    python benchmarks/bench_store.py --json_path data/output/code_penal.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from src.article_store import JsonArticleStore, write_packed
+
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {root!r})
+from src.article_store import open_article_store
+from src.search_index import SearchIndex
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        # Peak rather than current RSS where /proc is unavailable.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+base = rss_mb()
+start = time.perf_counter()
+store = open_article_store({path!r})
+open_seconds = time.perf_counter() - start
+open_rss = rss_mb()
+start = time.perf_counter()
+results = [store.article(i) for i in range(0, len(store), max(1, len(store) // 10))]
+fetch_seconds = time.perf_counter() - start
+start = time.perf_counter()
+index = SearchIndex(store.article_ids, store.iter_contents())
+index_seconds = time.perf_counter() - start
+print(json.dumps({{
+    "open_ms": open_seconds * 1000, "fetch_ms": fetch_seconds * 1000, "index_ms": index_seconds * 1000,
+    "open_rss_mb": open_rss - base, "indexed_rss_mb": rss_mb() - base,
+}}))
+"""
+
+
+def measure(path):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=ROOT, path=path)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark article store loading")
+    parser.add_argument("--json_path", default="data/output/code_penal.json")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        packed_path = os.path.join(tmp_dir, "code.lcpk")
+        store = JsonArticleStore(args.json_path)
+        write_packed(packed_path, store.articles, store.hierarchy_tree)
+        del store
+
+        print(f"{'format':8} {'size MB':>8} {'open ms':>8} {'RSS MB':>7} {'fetch ms':>9} "
+              f"{'index ms':>9} {'RSS+index':>10}")
+        for name, path in (("json", args.json_path), ("packed", packed_path)):
+            m = measure(path)
+            print(f"{name:8} {os.path.getsize(path) / 1e6:8.2f} {m['open_ms']:8.1f} {m['open_rss_mb']:7.1f} "
+                  f"{m['fetch_ms']:9.2f} {m['index_ms']:9.1f} {m['indexed_rss_mb']:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+"""Reproducible benchmark suite over the bundled legal codes.
+
+For each config, times the pipeline stages on the real data (PDF
+extraction from data/input, then cleaning, article splitting, hierarchy
+detection, keyword extraction and scoring, and summarization on the raw
+text in data/output), a full CodeProcessor run, and CodeServer.search_code
+on a fixed workload of article ids, single keywords, phrases and queries
+without hits. The corpus of one code is then replicated 10x and 100x to
+show how cleaning, parsing, keyword scoring and search scale.
+
+Everything runs offline: the LLM is the local stub of stub_llm_server.py
+and the query cache is disabled so searches are really executed. Results
+are written as JSON; --compare prints the ratio of every timing to a
+previous run and exits with status 1 when one got slower than --tolerance.
+
+Usage:
+    python benchmarks/bench_suite.py --save benchmarks/baseline.json
+    python benchmarks/bench_suite.py --compare benchmarks/baseline.json --skip_extraction
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "services"))
+from server import CodeServer
+from src.article_processor import ArticleProcessor
+from src.code_processor import CodeProcessor
+from src.code_registry import CodeRegistry
+from src.hierarchy_parser import HierarchyParser
+from src.keyword_scorer import KeywordScorer
+from src.pdf_text_extractor import PdfTextExtractor
+from src.query_cache import QueryCache
+from src.summarizer import Summarizer
+from src.text_cleaner import TextCleaner
+from stub_llm_server import start_stub_server
+
+CONFIGS = ["configs/code_penal.json", "configs/code_assurances.json"]
+WORKLOAD = {
+    "article_ids": ["Article 121-3", "Article 222-1", "Article L113-1", "R625-1", "L121-1"],
+    "keywords": ["escroquerie", "assurance", "sinistre", "vol", "contrat"],
+    "phrases": [
+        "responsabilité pénale des personnes morales",
+        "réclusion criminelle à perpétuité",
+        "mise en danger de la vie d'autrui",
+        "résiliation du contrat d'assurance",
+        "indemnisation des victimes",
+    ],
+    "no_hit": ["xylophone", "Article Z999-9", "chromodynamique quantique"],
+}
+
+
+def timed(func, repeat):
+    """Run func repeat times; return ({"median_s", "min_s"}, last result)."""
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return {"median_s": round(statistics.median(samples), 6), "min_s": round(min(samples), 6)}, result
+
+
+def make_parser(config):
+    return HierarchyParser(config["hierarchy_patterns"], config["level_keys"], config["article_pattern"])
+
+
+def detect_all(parser, preceding_texts):
+    prev_hierarchy = {lvl: "" for lvl in parser.level_keys}
+    for preceding_text in preceding_texts[:-1]:
+        prev_hierarchy = parser.detect_hierarchy(preceding_text, prev_hierarchy)
+
+
+def score_keywords(candidate_lists):
+    scorer = KeywordScorer()
+    for candidates in candidate_lists:
+        scorer.add(candidates)
+    return scorer.top_keywords()
+
+
+def stage_timings(config, llm_config, tmp_dir, args):
+    stages = {}
+    if not args.skip_extraction:
+        txt_path = os.path.join(tmp_dir, os.path.basename(config["txt_path"]))
+        extractor = PdfTextExtractor(config["pdf_path"], txt_path, workers=config.get("pdf_workers", 1))
+        stages["extraction"], _ = timed(extractor.extract_text, 1)
+    with open(config["txt_path"], "r", encoding="utf-8") as f:
+        raw_text = f.read()
+
+    cleaner = TextCleaner(config["cleaning_patterns"])
+    stages["cleaning"], text = timed(lambda: cleaner.clean_text(raw_text), args.repeat)
+    parser = make_parser(config)
+    stages["split_by_articles"], splits = timed(lambda: parser.split_by_articles(text), args.repeat)
+    stages["detect_hierarchy"], _ = timed(lambda: detect_all(parser, splits[2]), args.repeat)
+    stages["iter_articles"], articles = timed(lambda: list(parser.iter_articles(text)), args.repeat)
+
+    processor = ArticleProcessor(
+        config["stop_words"], llm_config,
+        keyword_backend=config.get("keyword_backend", "nltk"),
+        keyword_expressions=config.get("keyword_expressions")
+    )
+    contents = [content for _, content, _ in articles]
+    stages["keyword_extraction"], analyses = timed(
+        lambda: [processor.analyze_article(content, config["content_patterns"]) for content in contents], args.repeat
+    )
+    candidate_lists = [analysis["candidates"] for analysis in analyses]
+    stages["keyword_scoring"], _ = timed(lambda: score_keywords(candidate_lists), args.repeat)
+
+    batch = [{"content": analysis["content"], "summary": ""} for analysis in analyses[:args.summary_limit]]
+
+    def summarize():
+        cache_path = os.path.join(tempfile.mkdtemp(dir=tmp_dir), "summaries.sqlite")
+        summarizer = Summarizer(processor.llm, llm_config["model"], cache_path, concurrency=8, retry_delay=0.05)
+        return summarizer.summarize([dict(article) for article in batch])
+
+    stages["summarization"], _ = timed(summarize, args.repeat)
+    stages["summarization"]["articles"] = len(batch)
+    return stages, len(articles)
+
+
+def pipeline_timing(config, llm_config, tmp_dir):
+    config = dict(
+        config, llm_config=llm_config, summary={}, embeddings={},
+        json_path=os.path.join(tmp_dir, os.path.basename(config["json_path"])),
+        packed_path=None,
+    )
+    processor = CodeProcessor(config, use_cache=False, progress_desc="pipeline")
+    start = time.perf_counter()
+    processor.process()
+    seconds = time.perf_counter() - start
+    stages = processor.profiler.report()["stages"]
+    return {
+        "total_s": round(seconds, 6),
+        "stages_s": {name: stage["seconds"] for name, stage in stages.items()},
+    }, config["json_path"]
+
+
+def search_timings(json_path, repeat):
+    registry = CodeRegistry.from_path(json_path)
+    server = CodeServer(registry, QueryCache(max_entries=0))
+    start = time.perf_counter()
+    registry.get(registry.names()[0])
+    results = {"load_s": round(time.perf_counter() - start, 6)}
+    for category, queries in WORKLOAD.items():
+        samples = []
+        for _ in range(repeat):
+            for query in queries:
+                start = time.perf_counter()
+                server.search_code(query)
+                samples.append(time.perf_counter() - start)
+        samples.sort()
+        results[category] = {
+            "p50_ms": round(statistics.median(samples) * 1000, 4),
+            "p95_ms": round(samples[max(0, int(len(samples) * 0.95) - 1)] * 1000, 4),
+        }
+    return results
+
+
+def replicate_output(json_path, scale, out_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    articles = []
+    for copy in range(scale):
+        suffix = "" if copy == 0 else f"-x{copy}"
+        for article in data["articles"]:
+            articles.append(dict(
+                article, article_id=article["article_id"] + suffix,
+                references=[ref + suffix for ref in article["references"]],
+                referenced_by=[ref + suffix for ref in article["referenced_by"]],
+            ))
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump({"articles": articles, "hierarchy_tree": data["hierarchy_tree"]}, f, ensure_ascii=False)
+    return len(articles)
+
+
+def scaling_timings(config, raw_text, json_path, llm_config, tmp_dir, args):
+    cleaner = TextCleaner(config["cleaning_patterns"])
+    parser = make_parser(config)
+    processor = ArticleProcessor(
+        config["stop_words"], llm_config,
+        keyword_backend=config.get("keyword_backend", "nltk"),
+        keyword_expressions=config.get("keyword_expressions")
+    )
+    contents = [content for _, content, _ in parser.iter_articles(cleaner.clean_text(raw_text))]
+    candidate_lists = [processor.analyze_article(content, config["content_patterns"])["candidates"]
+                       for content in contents]
+
+    results = {}
+    for scale in args.scales:
+        scaled_text = raw_text * scale
+        row = {}
+        row["cleaning"], text = timed(lambda: cleaner.clean_text(scaled_text), 1)
+        row["iter_articles"], articles = timed(lambda: sum(1 for _ in parser.iter_articles(text)), 1)
+        row["keyword_scoring"], _ = timed(lambda: score_keywords(candidate_lists * scale), 1)
+        scaled_path = os.path.join(tmp_dir, f"scaled_{scale}.json")
+        row["articles"] = replicate_output(json_path, scale, scaled_path)
+        row["search"] = search_timings(scaled_path, 1)
+        os.remove(scaled_path)
+        results[f"x{scale}"] = row
+        print(f"  x{scale}: {row['articles']} articles, cleaning {row['cleaning']['median_s']:.3f} s, "
+              f"parsing {row['iter_articles']['median_s']:.3f} s, "
+              f"keyword scoring {row['keyword_scoring']['median_s']:.3f} s, "
+              f"index load {row['search']['load_s']:.2f} s, "
+              f"phrase search p50 {row['search']['phrases']['p50_ms']:.2f} ms")
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=""):
+    """Timing leaves of a results dict, as {"a/b/median_s": value}."""
+    leaves = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            leaves.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and key.endswith(("_s", "_ms")) and key != "min_s":
+            leaves[path] = value
+    return leaves
+
+
+def compare(baseline, current, tolerance):
+    """Print current timings against the baseline; return the number of regressions."""
+    old = flatten(baseline["results"])
+    new = flatten(current["results"])
+    regressions = 0
+    print(f"\n{'timing':72} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for path in sorted(old.keys() & new.keys()):
+        # Sub-millisecond timings are too noisy to flag.
+        if not old[path] or max(old[path], new[path]) < (1.0 if path.endswith("_ms") else 0.001):
+            continue
+        ratio = new[path] / old[path]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  slower"
+            regressions += 1
+        elif ratio < 1 / (1 + tolerance):
+            flag = "  faster"
+        print(f"{path[:72]:72} {old[path]:10.4f} {new[path]:10.4f} {ratio:7.2f}{flag}")
+    print(f"{regressions} timings slower than the baseline by more than {tolerance:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--configs", nargs="+", default=CONFIGS)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per stage, the median is reported")
+    parser.add_argument("--search_repeat", type=int, default=20, help="Runs of each workload query")
+    parser.add_argument("--summary_limit", type=int, default=100, help="Articles summarized by the stub LLM")
+    parser.add_argument("--llm_latency", type=float, default=0.0, help="Seconds the stub LLM takes per completion")
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100])
+    parser.add_argument("--scale_config", default=CONFIGS[0], help="Config whose corpus is replicated")
+    parser.add_argument("--skip_extraction", action="store_true", help="Do not time PDF extraction")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Slowdown ratio above 1 reported as a regression")
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    server, base_url = start_stub_server(latency=args.llm_latency)
+    results = {"codes": {}}
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for config_path in args.configs:
+                with open(config_path, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+                llm_config = dict(config["llm_config"], base_url=base_url)
+                name = os.path.splitext(os.path.basename(config_path))[0]
+                print(f"{name}: stages")
+                stages, articles = stage_timings(config, llm_config, tmp_dir, args)
+                print(f"{name}: pipeline")
+                pipeline, json_path = pipeline_timing(config, llm_config, tmp_dir)
+                print(f"{name}: search")
+                search = search_timings(json_path, args.search_repeat)
+                results["codes"][name] = {"articles": articles, "stages": stages, "pipeline": pipeline, "search": search}
+                for stage, timing in stages.items():
+                    print(f"  {stage:20} {timing['median_s']:8.3f} s")
+                print(f"  {'pipeline':20} {pipeline['total_s']:8.3f} s")
+                for category, timing in search.items():
+                    if category != "load_s":
+                        print(f"  search {category:13} p50 {timing['p50_ms']:7.3f} ms  p95 {timing['p95_ms']:7.3f} ms")
+
+                if config_path == args.scale_config:
+                    print(f"{name}: scaling")
+                    with open(config["txt_path"], "r", encoding="utf-8") as f:
+                        raw_text = f.read()
+                    results["codes"][name]["scaling"] = scaling_timings(
+                        config, raw_text, json_path, llm_config, tmp_dir, args
+                    )
+    finally:
+        server.shutdown()
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results saved to {args.save}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Summarization throughput against the local stub LLM.
+
+Runs the Summarizer twice over the articles of a processed code: the first
+pass measures articles/s for a given concurrency, the second one should be
+served entirely from the on-disk cache.
+
+With --processes N it then checks that N processes can fill the same cache
+file at once, as codes processed in parallel by main.py do, and exits with
+status 1 if one of them fails.
+
+Usage:
+    python benchmarks/bench_summarize.py --limit 200 --latency 0.2 --concurrency 1 8 32
+    python benchmarks/bench_summarize.py --limit 200 --latency 0.3 --concurrency 8 --processes 2
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llama_index.llms.ollama import Ollama
+from src.summarizer import Summarizer
+from stub_llm_server import start_stub_server
+
+
+def summarize_in_process(articles, base_url, cache_path, concurrency):
+    llm = Ollama(model="stub", base_url=base_url, request_timeout=60.0, context_window=8192)
+    return Summarizer(llm, "stub", cache_path, concurrency=concurrency, retry_delay=0.05).summarize(articles)
+
+
+def shared_cache_check(articles, base_url, processes, concurrency):
+    """Summarize overlapping halves of the articles from several processes into one cache file."""
+    half = len(articles) // 2
+    with tempfile.TemporaryDirectory() as cache_dir, ProcessPoolExecutor(processes) as pool:
+        cache_path = os.path.join(cache_dir, "summaries.sqlite")
+        batches = [
+            [dict(article, summary="") for article in (articles[:half + half // 2] if i % 2 else articles[half // 2:])]
+            for i in range(processes)
+        ]
+        futures = [pool.submit(summarize_in_process, batch, base_url, cache_path, concurrency) for batch in batches]
+        failures = 0
+        for i, future in enumerate(futures):
+            try:
+                stats = future.result()
+                print(f"process {i}: {stats['requested']} requested, {stats['cached']} from cache, "
+                      f"{stats['failed']} failed")
+            except Exception as e:
+                failures += 1
+                print(f"process {i}: failed: {e!r}")
+        warm = Summarizer(None, "stub", cache_path).summarize([dict(article, summary="") for article in articles])
+        print(f"shared cache: {warm['cached']} of {len(articles)} articles cached after {processes} processes")
+    return failures == 0 and warm["requested"] == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark article summarization")
+    parser.add_argument("--json_path", default="data/output/code_penal.json")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--fail_rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--processes", type=int, default=0, help="Processes sharing one cache file, 0 to skip")
+    args = parser.parse_args()
+
+    with open(args.json_path, "r", encoding="utf-8") as f:
+        articles = json.load(f)["articles"][:args.limit]
+    server, base_url = start_stub_server(latency=args.latency, fail_rate=args.fail_rate)
+    llm = Ollama(model="stub", base_url=base_url, request_timeout=60.0, context_window=8192)
+
+    try:
+        for concurrency in args.concurrency:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                cache_path = os.path.join(cache_dir, "summaries.sqlite")
+                batch = [dict(article, summary="") for article in articles]
+                summarizer = Summarizer(llm, "stub", cache_path, concurrency=concurrency, retry_delay=0.05)
+                cold = summarizer.summarize(batch)
+                warm = summarizer.summarize([dict(article, summary="") for article in articles])
+                print(f"concurrency={concurrency:<3} cold: {cold['articles_per_second']:8.1f} articles/s "
+                      f"({cold['seconds']:.2f} s, {cold['failed']} failed)  "
+                      f"warm: {warm['cached']} cached in {warm['seconds']:.3f} s")
+        if args.processes and not shared_cache_check(articles, base_url, args.processes, args.concurrency[-1]):
+            sys.exit(1)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
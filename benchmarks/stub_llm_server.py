@@ -0,0 +1,89 @@
+"""Minimal local stand-in for the Ollama HTTP API, for offline runs and benchmarks.
+
+Answers /api/chat and /api/generate with the first characters of the last
+prompt after a configurable delay, so the pipeline can be exercised without
+a model.
+
+Usage:
+    python benchmarks/stub_llm_server.py --port 11500 --latency 0.2
+then set "base_url": "http://127.0.0.1:11500" in the config's llm_config.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(latency, fail_rate):
+    class StubOllamaHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path == "/api/show":
+                # Older ollama clients read "modelinfo", newer ones "model_info".
+                info = {"stub.context_length": 8192}
+                self._reply(200, {"modelinfo": info, "model_info": info})
+                return
+            if self.path not in ("/api/chat", "/api/generate"):
+                self._reply(404, {"error": f"unknown endpoint {self.path}"})
+                return
+
+            time.sleep(latency)
+            if random.random() < fail_rate:
+                self._reply(500, {"error": "stub failure"})
+                return
+            if self.path == "/api/chat":
+                prompt = request["messages"][-1]["content"]
+            else:
+                prompt = request["prompt"]
+            text = "Résumé : " + prompt.rsplit("\n\n", 1)[-1][:80]
+            reply = {
+                "model": request.get("model", "stub"),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "done": True,
+                "done_reason": "stop",
+            }
+            if self.path == "/api/chat":
+                reply["message"] = {"role": "assistant", "content": text}
+            else:
+                reply["response"] = text
+            self._reply(200, reply)
+
+    return StubOllamaHandler
+
+
+def start_stub_server(port=0, latency=0.0, fail_rate=0.0):
+    """Start the stub in a daemon thread and return (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, fail_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Ollama server")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per completion")
+    parser.add_argument("--fail_rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(args.latency, args.fail_rate))
+    print(f"Stub LLM listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
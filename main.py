@@ -1,17 +1,22 @@
+import glob
 import json
-import nltk
 import os
+import sys
+from src.batch_runner import run_batch
 from src.code_processor import CodeProcessor
 import argparse
 
-try:
-    nltk.data.find('tokenizers/punkt')
-    nltk.data.find('corpora/stopwords')
-    nltk.data.find('taggers/averaged_perceptron_tagger')
-except LookupError:
-    nltk.download('punkt')
-    nltk.download('stopwords')
-    nltk.download('averaged_perceptron_tagger')
+def ensure_nltk_data():
+    # Only the "nltk" keyword backend needs these resources.
+    import nltk
+    try:
+        nltk.data.find('tokenizers/punkt')
+        nltk.data.find('corpora/stopwords')
+        nltk.data.find('taggers/averaged_perceptron_tagger')
+    except LookupError:
+        nltk.download('punkt')
+        nltk.download('stopwords')
+        nltk.download('averaged_perceptron_tagger')
 
 def load_config(config_path):
     if not os.path.exists(config_path):
@@ -33,8 +38,45 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process French legal code PDFs")
     parser.add_argument("--config", default="configs/code_assurances.json", 
                         help="Path to configuration file")
+    parser.add_argument("--no_cache", action="store_true",
+                        help="Reprocess every stage instead of reusing cached artifacts")
+    parser.add_argument("--summarize", action="store_true",
+                        help="Generate article summaries with the configured LLM")
+    parser.add_argument("--configs",
+                        help="Glob of configuration files (e.g. 'configs/*.json') processed in parallel")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for --configs (default: one per CPU)")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=["cprofile", "pyinstrument"],
+                        help="Write a per-stage JSON report and a cProfile (default) or pyinstrument "
+                             "profile next to each output")
     args = parser.parse_args()
 
+    if args.configs:
+        jobs = []
+        failed = 0
+        for config_path in sorted(glob.glob(args.configs)):
+            try:
+                config = load_config(config_path)
+            except (OSError, KeyError, ValueError) as e:
+                print(f"{config_path}: invalid configuration: {e}")
+                failed += 1
+                continue
+            if args.summarize:
+                config.setdefault("summary", {})["enabled"] = True
+            jobs.append((os.path.splitext(os.path.basename(config_path))[0], config))
+        if any(config.get("keyword_backend", "nltk") == "nltk" for _, config in jobs):
+            ensure_nltk_data()
+        results = run_batch(jobs, workers=args.workers, use_cache=not args.no_cache, profile=args.profile)
+        failed += sum(result["status"] == "failed" for result in results)
+        sys.exit(1 if failed else 0)
+
     config = load_config(args.config)
-    processor = CodeProcessor(config)
-    processor.process()
\ No newline at end of file
+    if args.summarize:
+        config.setdefault("summary", {})["enabled"] = True
+    if config.get("keyword_backend", "nltk") == "nltk":
+        ensure_nltk_data()
+    processor = CodeProcessor(config, use_cache=not args.no_cache)
+    if args.profile:
+        processor.profile(args.profile)
+    else:
+        processor.process()
@@ -1,6 +1,10 @@
 import asyncio
+import itertools
 import json
 import logging
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import scrolledtext, ttk, messagebox
 from dotenv import load_dotenv
@@ -8,7 +12,7 @@ from llama_index.llms.ollama import Ollama
 from llama_index.llms.openai import OpenAI
 from llama_index.core import Settings
 from llama_index.tools.mcp import BasicMCPClient, McpToolSpec
-from llama_index.core.agent.workflow import FunctionAgent, ToolCallResult, ToolCall
+from llama_index.core.agent.workflow import AgentStream, FunctionAgent, ToolCallResult, ToolCall
 from llama_index.core.workflow import Context
 import os
 
@@ -34,11 +38,52 @@ Follow these guidelines:
 Respond in a professional and precise manner, avoiding irrelevant details. If the input is ambiguous, request clarification to ensure accuracy.
 """
 
+POLL_MS = 50
+SHUTDOWN_TIMEOUT = 5
+TOOL_OUTPUT_CHARS = 300
+
+
+def format_response(response: str) -> str:
+    """Render a final agent response, listing articles when it is a search result."""
+    try:
+        parsed_response = json.loads(response)
+    except json.JSONDecodeError:
+        return f"{response}\n"
+    if not isinstance(parsed_response, dict):
+        return f"{response}\n"
+    if "error" in parsed_response:
+        return f"Error: {parsed_response['error']}\n"
+    if not parsed_response.get("articles"):
+        return "No articles found matching the query.\n"
+    lines = ["Search Results:\n"]
+    for article in parsed_response["articles"]:
+        lines.append(f"Article {article['article_id']}:")
+        if "summary" in article:
+            lines.append(f"  Summary: {article['summary']}")
+        if "keywords" in article:
+            lines.append(f"  Keywords: {', '.join(article['keywords'])}")
+        if "content" in article:
+            lines.append(f"  Content: {article['content'][:200]}...")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
 class CodeHelperApp:
+    """Tkinter front end of the agent.
+
+    The asyncio loop that runs the agent lives in a background thread, so
+    the UI never waits on the LLM or the MCP server. Coroutines are submitted
+    to it with run_coroutine_threadsafe and report back through a thread-safe
+    queue of events, which the Tk thread drains every POLL_MS milliseconds:
+    tool calls, tool results and response tokens are written to the result
+    pane as they arrive. Several queries may run at once, each writing to its
+    own section of the pane, and Cancel stops the ones in flight.
+    """
+
     def __init__(self, root, server_url: str, code_type: str, model: str):
         self.root = root
         self.root.title(f"{code_type} MCP Assistant")
-        self.root.geometry("600x400")
+        self.root.geometry("700x500")
         self.server_url = server_url
         self.code_type = code_type
 
@@ -53,11 +98,16 @@ class CodeHelperApp:
         self.mcp_client = BasicMCPClient(server_url)
         self.mcp_tool = McpToolSpec(client=self.mcp_client)
 
-        # Initialize agent and context
-        self.loop = asyncio.get_event_loop()
-        self.tools = self.loop.run_until_complete(self.get_tools())
-        self.agent = self.loop.run_until_complete(self.get_agent())
-        self.agent_context = Context(self.agent)
+        # Event loop thread and the queue it reports to
+        self.events = queue.Queue()
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, name="agent-loop", daemon=True)
+        self.loop_thread.start()
+        self.tools = None
+        self.agent = None
+        self.agent_context = None
+        self.query_ids = itertools.count(1)
+        self.running = {}
 
         # Create UI elements
         self.label = ttk.Label(root, text=f"Enter query for {code_type} (e.g., 'Article L432-1' or 'state guarantees'):")
@@ -67,19 +117,27 @@ class CodeHelperApp:
         self.query_entry.pack(pady=5)
         self.query_entry.bind("<Return>", self.search)
 
-        self.search_button = ttk.Button(root, text="Search", command=self.search)
-        self.search_button.pack(pady=5)
+        buttons = ttk.Frame(root)
+        buttons.pack(pady=5)
+        self.search_button = ttk.Button(buttons, text="Search", command=self.search, state="disabled")
+        self.search_button.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = ttk.Button(buttons, text="Cancel", command=self.cancel, state="disabled")
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
 
-        self.result_text = scrolledtext.ScrolledText(root, wrap=tk.WORD, width=70, height=15)
-        self.result_text.pack(pady=10, padx=10)
+        self.result_text = scrolledtext.ScrolledText(root, wrap=tk.WORD, width=80, height=20)
+        self.result_text.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
 
         self.exit_button = ttk.Button(root, text="Exit", command=self.exit)
         self.exit_button.pack(pady=5)
 
         # Loading indicator
-        self.loading_label = ttk.Label(root, text="")
+        self.loading_label = ttk.Label(root, text="Connecting to the MCP server...")
         self.loading_label.pack(pady=5)
 
+        self.root.protocol("WM_DELETE_WINDOW", self.exit)
+        asyncio.run_coroutine_threadsafe(self.start_agent(), self.loop)
+        self.root.after(POLL_MS, self.poll_events)
+
     async def get_tools(self):
         return await self.mcp_tool.to_tool_list_async()
 
@@ -92,58 +150,149 @@ class CodeHelperApp:
             system_prompt=SYSTEM_PROMPT,
         )
 
-    async def handle_user_message(self, message_content: str, verbose: bool = False):
+    async def start_agent(self):
         try:
-            handler = self.agent.run(message_content, ctx=self.agent_context)
+            self.tools = await self.get_tools()
+            self.agent = await self.get_agent()
+            self.agent_context = Context(self.agent)
+            self.events.put(("ready", None, len(self.tools)))
+        except Exception as e:
+            logger.error(f"Could not connect to {self.server_url}: {e}")
+            self.events.put(("failed", None, str(e)))
+
+    async def handle_user_message(self, query_id: int, message_content: str, shared_context: bool = True,
+                                  verbose: bool = False):
+        handler = None
+        try:
+            ctx = self.agent_context if shared_context else Context(self.agent)
+            handler = self.agent.run(message_content, ctx=ctx)
             async for event in handler.stream_events():
-                if verbose and isinstance(event, ToolCall):
-                    logger.info(f"Calling tool {event.tool_name} with kwargs {event.tool_kwargs}")
-                elif verbose and isinstance(event, ToolCallResult):
-                    logger.info(f"Tool {event.tool_name} returned {event.tool_output}")
+                if isinstance(event, ToolCall):
+                    if verbose:
+                        logger.info(f"Calling tool {event.tool_name} with kwargs {event.tool_kwargs}")
+                    self.events.put(("tool_call", query_id, event.tool_name, event.tool_kwargs))
+                elif isinstance(event, ToolCallResult):
+                    if verbose:
+                        logger.info(f"Tool {event.tool_name} returned {event.tool_output}")
+                    self.events.put(("tool_result", query_id, event.tool_name, str(event.tool_output)))
+                elif isinstance(event, AgentStream) and event.delta:
+                    self.events.put(("token", query_id, event.delta))
             response = await handler
-            return str(response)
+            self.events.put(("done", query_id, str(response)))
+        except asyncio.CancelledError:
+            # The "cancelled" event is posted by the future's done callback.
+            if handler is not None:
+                await handler.cancel_run()
+            raise
         except Exception as e:
             logger.error(f"Error handling user message: {e}")
-            return json.dumps({"error": str(e)})
+            self.events.put(("error", query_id, str(e)))
 
     def search(self, event=None):
         query = self.query_entry.get().strip()
         if not query:
             messagebox.showwarning("Input Error", "Please enter a query.")
             return
+        if self.agent is None:
+            return
+
+        query_id = next(self.query_ids)
+        self.result_text.insert(tk.END, f"> {query}\n\n")
+        # The query's output is inserted at this mark, which stays in front of
+        # the blank line separating it from the sections of later queries.
+        self.result_text.mark_set(f"query{query_id}", "end-2c")
+        self.result_text.see(tk.END)
+        future = asyncio.run_coroutine_threadsafe(
+            # The conversation context cannot be shared by two runs at once, so a
+            # query sent while another one is running gets a fresh context.
+            self.handle_user_message(query_id, query, shared_context=not self.running, verbose=True), self.loop
+        )
+        # Posted from here rather than by the coroutine, which may be cancelled
+        # before it starts running.
+        future.add_done_callback(lambda f: f.cancelled() and self.events.put(("cancelled", query_id)))
+        self.running[query_id] = {"future": future, "start": time.perf_counter(), "first_event": None, "streamed": False}
+        self.query_entry.delete(0, tk.END)
+        self.update_status()
 
-        self.loading_label.config(text="Searching...")
-        self.search_button.config(state="disabled")
-        self.root.update()
+    def cancel(self):
+        for state in self.running.values():
+            # Thread-safe: cancels the task on the loop, which stops the agent run.
+            state["future"].cancel()
 
+    def write(self, query_id: int, text: str):
+        self.result_text.insert(f"query{query_id}", text)
+        self.result_text.see(f"query{query_id}")
+
+    def poll_events(self):
         try:
-            response = self.loop.run_until_complete(
-                self.handle_user_message(query, verbose=True)
-            )
-            self.result_text.delete(1.0, tk.END)
-            try:
-                parsed_response = json.loads(response)
-                if "error" in parsed_response:
-                    self.result_text.insert(tk.END, f"Error: {parsed_response['error']}\n")
-                elif not parsed_response.get("articles"):
-                    self.result_text.insert(tk.END, "No articles found matching the query.\n")
-                else:
-                    self.result_text.insert(tk.END, "Search Results:\n\n")
-                    for article in parsed_response["articles"]:
-                        self.result_text.insert(tk.END, f"Article {article['article_id']}:\n")
-                        self.result_text.insert(tk.END, f"  Summary: {article['summary']}\n")
-                        self.result_text.insert(tk.END, f"  Keywords: {', '.join(article['keywords'])}\n")
-                        self.result_text.insert(tk.END, f"  Content: {article['content'][:200]}...\n\n")
-            except json.JSONDecodeError:
-                self.result_text.insert(tk.END, f"{response}\n")
-        except Exception as e:
-            logger.error(f"Search error: {e}")
-            messagebox.showerror("Error", f"Search failed: {str(e)}")
-        finally:
-            self.loading_label.config(text="")
+            while True:
+                self.handle_event(self.events.get_nowait())
+        except queue.Empty:
+            pass
+        self.root.after(POLL_MS, self.poll_events)
+
+    def handle_event(self, event):
+        kind, query_id = event[0], event[1]
+        if kind == "ready":
+            self.loading_label.config(text=f"Connected, {event[2]} tools available")
             self.search_button.config(state="normal")
+            return
+        if kind == "failed":
+            self.loading_label.config(text="Not connected")
+            messagebox.showerror("Error", f"Could not connect to the MCP server: {event[2]}")
+            return
+
+        state = self.running.get(query_id)
+        if state is None:
+            return
+        if state["first_event"] is None:
+            state["first_event"] = time.perf_counter() - state["start"]
+            logger.info(f"Query {query_id}: first event after {state['first_event']:.2f}s")
+
+        if kind == "tool_call":
+            self.write(query_id, f"[calling {event[2]} {json.dumps(event[3], ensure_ascii=False)}]\n")
+        elif kind == "tool_result":
+            output = event[3]
+            if len(output) > TOOL_OUTPUT_CHARS:
+                output = output[:TOOL_OUTPUT_CHARS] + "..."
+            self.write(query_id, f"[{event[2]} returned {output}]\n")
+        elif kind == "token":
+            state["streamed"] = True
+            self.write(query_id, event[2])
+        else:
+            if kind == "done":
+                # Streamed responses are already in the pane.
+                self.write(query_id, "\n" if state["streamed"] else format_response(event[2]))
+            elif kind == "error":
+                self.write(query_id, f"Error: {event[2]}\n")
+            elif kind == "cancelled":
+                self.write(query_id, "\n[cancelled]\n")
+            elapsed = time.perf_counter() - state["start"]
+            logger.info(f"Query {query_id} {kind} after {elapsed:.2f}s")
+            self.result_text.mark_unset(f"query{query_id}")
+            del self.running[query_id]
+            self.update_status()
+
+    def update_status(self):
+        count = len(self.running)
+        self.loading_label.config(text=f"Searching ({count} running)..." if count else "")
+        self.cancel_button.config(state="normal" if count else "disabled")
+
+    async def shutdown(self):
+        """Cancel the tasks on the loop and let them clean up, for up to SHUTDOWN_TIMEOUT seconds."""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=SHUTDOWN_TIMEOUT)
 
     def exit(self):
+        try:
+            asyncio.run_coroutine_threadsafe(self.shutdown(), self.loop).result(timeout=SHUTDOWN_TIMEOUT + 1)
+        except Exception as e:
+            logger.warning(f"Agent tasks did not shut down cleanly: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join(timeout=5)
         self.root.quit()
         self.root.destroy()
 
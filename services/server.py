@@ -1,11 +1,22 @@
 import argparse
+import asyncio
+import heapq
 import json
 import logging
 import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from mcp.server.fastmcp import FastMCP
 from typing import List, Dict, Optional
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.code_registry import CodeRegistry
+from src.profiler import LatencyHistogram
+from src.query_cache import QueryCache, normalize_query
+from src.search_index import highlight_snippet
+
 # Configure logging
 logging.basicConfig(
     level=os.getenv("LOG_LEVEL", "INFO"),
@@ -15,68 +26,578 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()
 
+# Article fields search_code returns unless the caller asks for others.
+DEFAULT_FIELDS = ["content", "hierarchy", "references", "referenced_by"]
+ARTICLE_FIELDS = {"content", "hierarchy", "references", "referenced_by", "summary", "keywords", "page_number"}
+# Reciprocal rank fusion: constant and number of hits taken from each ranking.
+RRF_K = 60
+RRF_DEPTH = 50
+# Most ids or queries accepted by one get_articles or search_many call.
+MAX_BATCH = 100
+
+def unknown_fields(fields: List[str]) -> List[str]:
+    return [field for field in fields if field not in ARTICLE_FIELDS]
+
+class ToolError(str):
+    """The JSON response of a tool call that failed, counted as an error in tool_stats."""
+
+def error_response(results_key: str, message: str) -> ToolError:
+    return ToolError(json.dumps({results_key: [], "error": message}))
+
+def with_skipped(response: Dict, skipped: List[str]) -> Dict:
+    """Add the codes left out to stay under the memory budget, if any, to a response."""
+    if skipped:
+        response["skipped_codes"] = skipped
+    return response
+
 class CodeServer:
-    def __init__(self, json_path: str):
-        self.mcp = FastMCP("Legal-Code-Server")
-        self.code_data = self._load_code_data(json_path)
-        
-    def _load_code_data(self, json_path: str) -> Dict:
-        """Load JSON data from the specified path."""
-        try:
-            if not os.path.exists(json_path):
-                logger.error(f"JSON file not found: {json_path}")
-                raise FileNotFoundError(f"JSON file not found: {json_path}")
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            logger.info(f"Successfully loaded JSON data from {json_path}")
-            return data
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse JSON: {e}")
-            raise
-        except Exception as e:
-            logger.error(f"Error loading JSON data: {e}")
-            raise
-
-    def search_code(self, query: str, max_results: int = 10) -> str:
+    def __init__(self, registry: CodeRegistry, query_cache: Optional[QueryCache] = None,
+                 tool_workers: int = 8, port: int = 8000):
+        self.mcp = FastMCP("Legal-Code-Server", port=port)
+        self.registry = registry
+        self.query_cache = query_cache if query_cache is not None else QueryCache()
+        self.tool_latency: Dict[str, LatencyHistogram] = {}
+        # Tools run in these threads rather than on the event loop, which then
+        # keeps reading and answering requests of other clients.
+        self.executor = ThreadPoolExecutor(tool_workers, thread_name_prefix="tool") if tool_workers > 0 else None
+        logger.info(f"Serving {len(registry.names())} codes: {', '.join(registry.names())}")
+
+    def _resolve_codes(self, code: Optional[str]) -> List[str]:
+        """Return the registry names to search: the requested code, or every code."""
+        if not code:
+            return self.registry.names()
+        name = self.registry.resolve(code)
+        if name is None:
+            raise KeyError(code)
+        return [name]
+
+    def list_codes(self) -> str:
+        """List the legal codes this server can search.
+
+        Returns:
+            str: JSON string with the name, title and load state of each code.
+        """
+        return json.dumps({"codes": self.registry.describe()}, ensure_ascii=False)
+
+    def _load_codes(self, names: List[str]):
+        """Return (loaded codes, skipped names): the requested code, or every code
+        that fits in the memory budget next to the loaded ones."""
+        if len(names) == 1:
+            return [self.registry.get(names[0])], []
+        codes, skipped = self.registry.within_budget(names)
+        if skipped:
+            logger.info(f"Not searching {', '.join(skipped)}: over the memory budget")
+        return codes, skipped
+
+    def _search(self, query: str, max_results: int, names: List[str]):
+        """Return (loaded code, SearchHit) pairs, from the query cache when possible,
+        and the names of the codes left out to stay under the memory budget."""
+        codes, skipped = self._load_codes(names)
+        # The file signatures make results of a replaced data file unreachable.
+        key = (normalize_query(query), max_results, tuple((c.name, c.signature) for c in codes))
+        hits = self.query_cache.get(key)
+        if hits is None:
+            hits = [(i, hit) for i, c in enumerate(codes) for hit in c.search_index.search(query, max_results)]
+            if len(codes) > 1:
+                hits = heapq.nlargest(max_results, hits, key=lambda item: (item[1].tier, item[1].score))
+            self.query_cache.put(key, hits)
+        return [(codes[i], hit) for i, hit in hits], skipped
+
+    def search_code(self, query: str, max_results: int = 10, code: Optional[str] = None,
+                    fields: Optional[List[str]] = None, snippet_chars: int = 0) -> str:
         """Search legal code articles for matches to the query.
 
+        Article ID matches come first, then articles containing the query as a
+        phrase, then the remaining articles ranked by BM25.
+
         Args:
             query (str): The search query (article ID, keyword, or phrase).
             max_results (int): Maximum number of results to return.
+            code (Optional[str]): Code to search (name or title, see list_codes).
+                Every code is searched when omitted.
+            fields (Optional[List[str]]): Article fields to return besides code and
+                article_id, among content, hierarchy, references, referenced_by,
+                summary, keywords and page_number. Defaults to content, hierarchy,
+                references and referenced_by; pass [] for ids only.
+            snippet_chars (int): When positive, add a "snippet" of about this many
+                characters around the first query term, with matches in **bold**.
 
         Returns:
-            str: JSON string containing matching articles.
+            str: JSON string containing matching articles. When every code is
+                searched, codes that did not fit in the server's memory budget
+                are left out and listed under skipped_codes; name one in code to
+                search it.
         """
-        results = []
-        query_lower = query.lower().strip()
-        if not query_lower:
+        if not query.strip():
             logger.warning("Empty query received")
-            return json.dumps({"articles": [], "error": "Empty query"})
-
-        for article in self.code_data["articles"]:
-            # Match article ID, content, keywords, or summary
-            if (query_lower == article["article_id"].lower() or
-                article["article_id"].lower() in query_lower or
-                query_lower in article["article_id"].lower() or
-                query_lower in article["content"].lower()):
-                results.append({
-                    "article_id": article["article_id"],
-                    "content": article["content"],
-                    "hierarchy": article["hierarchy"],
-                    "references": article["references"],
-                    "referenced_by": article["referenced_by"],
-                })
-                if len(results) >= max_results:
-                    break
-        
+            return error_response("articles", "Empty query")
+        fields = DEFAULT_FIELDS if fields is None else fields
+        unknown = unknown_fields(fields)
+        if unknown:
+            return error_response("articles", f"Unknown fields: {', '.join(unknown)}")
+        try:
+            names = self._resolve_codes(code)
+        except KeyError:
+            logger.warning(f"Unknown code requested: {code}")
+            return error_response("articles", f"Unknown code: {code}")
+
+        hits, skipped = self._search(query, max_results, names)
+        results = [self._format_article(loaded, hit.doc, query, fields, snippet_chars) for loaded, hit in hits]
         logger.info(f"Found {len(results)} articles for query: {query}")
-        return json.dumps({"articles": results})
+        return json.dumps(with_skipped({"articles": results}, skipped))
+
+    def _format_article(self, loaded, doc: int, query: str, fields: List[str], snippet_chars: int) -> Dict:
+        result = {"code": loaded.name, "article_id": loaded.store.article_ids[doc]}
+        if fields:
+            article = loaded.store.article(doc)
+            result.update((field, article[field]) for field in fields)
+        if snippet_chars > 0:
+            result["snippet"] = highlight_snippet(loaded.store.content(doc), query, snippet_chars)
+        return result
+
+    def get_articles(self, ids: List[str], code: Optional[str] = None,
+                     fields: Optional[List[str]] = None) -> str:
+        """Fetch several articles by id in a single call.
+
+        Args:
+            ids (List[str]): Article ids, e.g. ["Article 121-3", "L113-2"] (at most 100).
+            code (Optional[str]): Code the articles belong to (name or title, see
+                list_codes). Every code is looked up when omitted.
+            fields (Optional[List[str]]): Article fields to return, as for search_code.
+
+        Returns:
+            str: JSON string with the articles found, in the order of ids (an id
+                present in several codes or sections gives several articles), and
+                the ids that were not found.
+        """
+        if len(ids) > MAX_BATCH:
+            return error_response("articles", f"At most {MAX_BATCH} ids per call")
+        fields = DEFAULT_FIELDS if fields is None else fields
+        unknown = unknown_fields(fields)
+        if unknown:
+            return error_response("articles", f"Unknown fields: {', '.join(unknown)}")
+        try:
+            codes, skipped = self._load_codes(self._resolve_codes(code))
+        except KeyError:
+            return error_response("articles", f"Unknown code: {code}")
+
+        results = []
+        missing = []
+        for article_id in ids:
+            found = [
+                self._format_article(loaded, doc, "", fields, 0)
+                for loaded in codes for doc in loaded.find(article_id)
+            ]
+            if not found:
+                missing.append(article_id)
+            results.extend(found)
+        return json.dumps(with_skipped({"articles": results, "missing": missing}, skipped))
+
+    def search_many(self, queries: List[str], max_results: int = 10, code: Optional[str] = None,
+                    fields: Optional[List[str]] = None, snippet_chars: int = 0) -> str:
+        """Run several searches in a single call.
+
+        Args:
+            queries (List[str]): Search queries, as for search_code (at most 100).
+            max_results (int): Maximum number of results per query.
+            code (Optional[str]): Code to search (name or title, see list_codes).
+                Every code is searched when omitted.
+            fields (Optional[List[str]]): Article fields to return, as for search_code.
+            snippet_chars (int): When positive, add a "snippet" around the first
+                query term of each article.
+
+        Returns:
+            str: JSON string with, for each query in order, the query and its
+                matching articles.
+        """
+        if len(queries) > MAX_BATCH:
+            return error_response("results", f"At most {MAX_BATCH} queries per call")
+        fields = DEFAULT_FIELDS if fields is None else fields
+        unknown = unknown_fields(fields)
+        if unknown:
+            return error_response("results", f"Unknown fields: {', '.join(unknown)}")
+        try:
+            names = self._resolve_codes(code)
+        except KeyError:
+            return error_response("results", f"Unknown code: {code}")
+
+        results = []
+        skipped = []
+        for query in queries:
+            if not query.strip():
+                results.append({"query": query, "articles": []})
+                continue
+            hits, skipped = self._search(query, max_results, names)
+            results.append({"query": query, "articles": [
+                self._format_article(loaded, hit.doc, query, fields, snippet_chars) for loaded, hit in hits
+            ]})
+        logger.info(f"Ran {len(queries)} searches")
+        return json.dumps(with_skipped({"results": results}, skipped))
+
+    def semantic_search(self, query: str, max_results: int = 10, code: Optional[str] = None,
+                        hybrid: bool = False, fields: Optional[List[str]] = None,
+                        snippet_chars: int = 0) -> str:
+        """Find articles whose meaning is close to the query, even without shared words.
+
+        Articles are ranked by cosine similarity between their embedding and the
+        query's. With hybrid, the semantic ranking is fused with the search_code
+        ranking by reciprocal rank fusion.
+
+        Args:
+            query (str): A question or description in natural language.
+            max_results (int): Maximum number of results to return.
+            code (Optional[str]): Code to search; every code with embeddings is
+                searched when omitted.
+            hybrid (bool): Fuse semantic and lexical rankings.
+            fields (Optional[List[str]]): Article fields to return, as for search_code.
+            snippet_chars (int): Snippet length, as for search_code.
+
+        Returns:
+            str: JSON string containing matching articles with their score.
+        """
+        if not query.strip():
+            return error_response("articles", "Empty query")
+        fields = DEFAULT_FIELDS if fields is None else fields
+        unknown = unknown_fields(fields)
+        if unknown:
+            return error_response("articles", f"Unknown fields: {', '.join(unknown)}")
+        try:
+            names = self._resolve_codes(code)
+        except KeyError:
+            return error_response("articles", f"Unknown code: {code}")
+
+        scored = []
+        embedded = False
+        depth = max(max_results, RRF_DEPTH) if hybrid else max_results
+        codes, skipped = self._load_codes(names)
+        for loaded in codes:
+            if loaded.embeddings is None:
+                continue
+            embedded = True
+            semantic = loaded.embeddings.search(query, depth)
+            if not hybrid:
+                scored.extend((score, loaded, doc) for doc, score in semantic)
+                continue
+            fused = {}
+            lexical = [hit.doc for hit in loaded.search_index.search(query, depth)]
+            for ranking in ([doc for doc, _ in semantic], lexical):
+                for rank, doc in enumerate(ranking):
+                    fused[doc] = fused.get(doc, 0.0) + 1.0 / (RRF_K + rank + 1)
+            scored.extend((score, loaded, doc) for doc, score in fused.items())
+        if not embedded:
+            return error_response("articles", "No embeddings for this code, enable the embeddings stage")
+
+        results = []
+        for score, loaded, doc in heapq.nlargest(max_results, scored, key=lambda item: item[0]):
+            result = self._format_article(loaded, doc, query, fields, snippet_chars)
+            result["score"] = score
+            results.append(result)
+        logger.info(f"Found {len(results)} articles semantically close to: {query}")
+        return json.dumps(with_skipped({"articles": results}, skipped))
+
+    def _locate(self, article_id: str, code: Optional[str]):
+        """Return the loaded code and doc of an article id, searching every code when code is None."""
+        for name in self.registry.resident_first(self._resolve_codes(code)):
+            loaded = self.registry.get(name)
+            docs = loaded.find(article_id)
+            if docs:
+                return loaded, docs[0]
+        return None, None
+
+    def get_neighbours(self, article_id: str, hops: int = 1, direction: str = "both",
+                       code: Optional[str] = None, max_results: int = 50) -> str:
+        """List the articles within a number of citation hops of an article.
+
+        Args:
+            article_id (str): The article to start from (e.g. "L113-2").
+            hops (int): Maximum number of citations to follow.
+            direction (str): "out" for articles it cites, "in" for articles
+                citing it, "both" for either.
+            code (Optional[str]): Code of the article; every code is tried when omitted.
+            max_results (int): Maximum number of articles to return, nearest first.
+
+        Returns:
+            str: JSON string with the neighbouring article ids and their distance.
+        """
+        if direction not in ("in", "out", "both"):
+            return error_response("articles", f"Unknown direction: {direction}")
+        try:
+            loaded, doc = self._locate(article_id, code)
+        except KeyError:
+            return error_response("articles", f"Unknown code: {code}")
+        if loaded is None:
+            return error_response("articles", f"Unknown article: {article_id}")
+
+        distances = loaded.graph.neighbours(doc, max(hops, 1), direction)
+        nearest = sorted(distances.items(), key=lambda item: (item[1], item[0]))[:max_results]
+        return json.dumps({
+            "code": loaded.name,
+            "article_id": loaded.store.article_ids[doc],
+            "total": len(distances),
+            "articles": [
+                {"article_id": loaded.store.article_ids[d], "distance": distance}
+                for d, distance in nearest
+            ],
+        })
+
+    def citation_path(self, source_id: str, target_id: str, code: Optional[str] = None,
+                      directed: bool = True, max_hops: int = 10) -> str:
+        """Find a shortest chain of citations between two articles of the same code.
+
+        Args:
+            source_id (str): The article the path starts from.
+            target_id (str): The article the path ends at.
+            code (Optional[str]): Code of both articles; every code is tried when omitted.
+            directed (bool): Only follow citations from the citing to the cited
+                article. When False, citations are followed both ways.
+            max_hops (int): Longest path to look for.
+
+        Returns:
+            str: JSON string with the article ids along the path, or an empty
+            path when the articles are not connected.
+        """
+        try:
+            names = self._resolve_codes(code)
+        except KeyError:
+            return error_response("path", f"Unknown code: {code}")
+        for name in self.registry.resident_first(names):
+            loaded = self.registry.get(name)
+            sources, targets = loaded.find(source_id), loaded.find(target_id)
+            if not sources or not targets:
+                continue
+            path = loaded.graph.shortest_path(sources[0], targets[0], directed, max_hops)
+            return json.dumps({
+                "code": loaded.name,
+                "path": [loaded.store.article_ids[d] for d in path or []],
+            })
+        return error_response("path", f"No code contains both {source_id} and {target_id}")
+
+    def most_cited(self, code: Optional[str] = None, limit: int = 10, by: str = "in_degree") -> str:
+        """List the most cited articles.
+
+        Args:
+            code (Optional[str]): Code to rank; the top articles of every code
+                are merged when omitted.
+            limit (int): Maximum number of articles to return.
+            by (str): "in_degree" (number of citing articles) or "pagerank".
+
+        Returns:
+            str: JSON string with article ids and their score.
+        """
+        if by not in ("in_degree", "pagerank"):
+            return error_response("articles", f"Unknown ranking: {by}")
+        try:
+            names = self._resolve_codes(code)
+        except KeyError:
+            return error_response("articles", f"Unknown code: {code}")
+
+        ranked = []
+        codes, skipped = self._load_codes(names)
+        for loaded in codes:
+            ranked.extend((score, loaded, doc) for doc, score in loaded.graph.most_cited(limit, by))
+        ranked = heapq.nlargest(limit, ranked, key=lambda item: item[0])
+        return json.dumps(with_skipped({"articles": [
+            {"code": loaded.name, "article_id": loaded.store.article_ids[doc], by: score}
+            for score, loaded, doc in ranked
+        ]}, skipped))
+
+    def _locate_node(self, node: str, code: Optional[str]):
+        """Return the loaded code and hierarchy node of a path, trying every code when code is None."""
+        for name in self.registry.resident_first(self._resolve_codes(code)):
+            loaded = self.registry.get(name)
+            found = loaded.hierarchy.resolve(node)
+            if found is not None:
+                return loaded, found
+        return None, None
+
+    def list_children(self, node: str = "", code: Optional[str] = None) -> str:
+        """List the headings directly below a node of a code's hierarchy.
+
+        Args:
+            node (str): Path of the node, either as returned by these tools or as
+                headings separated by ">" or "," (e.g. "Livre II, Titre II").
+                Empty for the top level.
+            code (Optional[str]): Code to browse; every code is tried when omitted.
+
+        Returns:
+            str: JSON string with the node and its children (path, level, title,
+            number of articles and of children).
+        """
+        try:
+            loaded, found = self._locate_node(node, code)
+        except KeyError:
+            return error_response("children", f"Unknown code: {code}")
+        if loaded is None:
+            return error_response("children", f"Unknown node: {node}")
+        index = loaded.hierarchy
+        return json.dumps({
+            "code": loaded.name,
+            "node": index.describe(found),
+            "children": [index.describe(child) for child in index.children[found]],
+        }, ensure_ascii=False)
+
+    def get_articles_under(self, node: str, code: Optional[str] = None, offset: int = 0,
+                           limit: int = 50, snippet_chars: int = 0) -> str:
+        """List the articles under a node of a code's hierarchy, in document order.
+
+        Args:
+            node (str): Path of the node (see list_children).
+            code (Optional[str]): Code to browse; every code is tried when omitted.
+            offset (int): Number of articles to skip, for pagination.
+            limit (int): Maximum number of articles to return.
+            snippet_chars (int): When positive, add the first characters of each article.
+
+        Returns:
+            str: JSON string with the node, the total number of articles under
+            it, the requested page of article ids and the offset of the next page.
+        """
+        try:
+            loaded, found = self._locate_node(node, code)
+        except KeyError:
+            return error_response("articles", f"Unknown code: {code}")
+        if loaded is None:
+            return error_response("articles", f"Unknown node: {node}")
+        index = loaded.hierarchy
+        offset = max(offset, 0)
+        docs = index.articles(found, offset, max(limit, 0))
+        articles = []
+        for doc in docs:
+            article = {"article_id": loaded.store.article_ids[doc]}
+            if snippet_chars > 0:
+                article["snippet"] = highlight_snippet(loaded.store.content(doc), "", snippet_chars)
+            articles.append(article)
+        next_offset = offset + len(docs)
+        return json.dumps({
+            "code": loaded.name,
+            "node": index.describe(found),
+            "total": index.count(found),
+            "offset": offset,
+            "next_offset": next_offset if next_offset < index.count(found) else None,
+            "articles": articles,
+        }, ensure_ascii=False)
+
+    def get_ancestry(self, article_id: str, code: Optional[str] = None) -> str:
+        """Return the chain of headings an article belongs to, from the top level down.
+
+        Args:
+            article_id (str): The article (e.g. "L113-2").
+            code (Optional[str]): Code of the article; every code is tried when omitted.
+
+        Returns:
+            str: JSON string with one entry (path, level, title, number of
+            articles and of children) per heading.
+        """
+        try:
+            loaded, doc = self._locate(article_id, code)
+        except KeyError:
+            return error_response("ancestry", f"Unknown code: {code}")
+        if loaded is None:
+            return error_response("ancestry", f"Unknown article: {article_id}")
+        index = loaded.hierarchy
+        return json.dumps({
+            "code": loaded.name,
+            "article_id": loaded.store.article_ids[doc],
+            "ancestry": [index.describe(node) for node in index.ancestry(doc)],
+        }, ensure_ascii=False)
+
+    def _call(self, tool: str, method, *args) -> str:
+        """Run a tool method, recording its latency and outcome in the tool's histogram."""
+        start = time.perf_counter()
+        error = True
+        try:
+            result = method(*args)
+            error = isinstance(result, ToolError)
+            return result
+        finally:
+            histogram = self.tool_latency.get(tool)
+            if histogram is None:
+                histogram = self.tool_latency.setdefault(tool, LatencyHistogram())
+            histogram.observe((time.perf_counter() - start) * 1000, error)
+
+    async def _offload(self, tool: str, method, *args) -> str:
+        """Run a tool method in the executor, or inline when there is none."""
+        if self.executor is None:
+            return self._call(tool, method, *args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._call, tool, method, *args)
+
+    def tool_stats(self) -> str:
+        """Latency histograms of the tools called since the server started.
+
+        Returns:
+            str: JSON string with, per tool, the number of calls and errors, mean,
+                p50/p95/p99 and max latency in ms and the call count per latency
+                bucket, plus the query cache hits and misses and the number of
+                codes reloaded by the file watcher.
+        """
+        return json.dumps({
+            "tools": {tool: histogram.describe() for tool, histogram in sorted(self.tool_latency.items())},
+            "query_cache": {"hits": self.query_cache.hits, "misses": self.query_cache.misses},
+            "reloads": self.registry.reloads,
+        })
 
     def register_tools(self):
-        """Register tools with MCP."""
-        @self.mcp.tool()
-        def search_code(query: str, max_results: int = 10) -> str:
-            return self.search_code(query, max_results)
+        """Register tools with MCP.
+
+        The tools return JSON text, so they are registered without structured
+        output: FastMCP would otherwise send every result twice (as text and
+        as {"result": text}) and validate it against a JSON schema on the
+        event loop, which costs more than most searches.
+        """
+        @self.mcp.tool(structured_output=False)
+        async def search_code(query: str, max_results: int = 10, code: Optional[str] = None,
+                              fields: Optional[List[str]] = None, snippet_chars: int = 0) -> str:
+            return await self._offload("search_code", self.search_code, query, max_results, code, fields, snippet_chars)
+
+        @self.mcp.tool(structured_output=False)
+        async def semantic_search(query: str, max_results: int = 10, code: Optional[str] = None,
+                                  hybrid: bool = False, fields: Optional[List[str]] = None,
+                                  snippet_chars: int = 0) -> str:
+            return await self._offload("semantic_search", self.semantic_search, query, max_results, code, hybrid, fields, snippet_chars)
+
+        @self.mcp.tool(structured_output=False)
+        def list_codes() -> str:
+            return self._call("list_codes", self.list_codes)
+
+        @self.mcp.tool(structured_output=False)
+        async def get_neighbours(article_id: str, hops: int = 1, direction: str = "both",
+                                 code: Optional[str] = None, max_results: int = 50) -> str:
+            return await self._offload("get_neighbours", self.get_neighbours, article_id, hops, direction, code, max_results)
+
+        @self.mcp.tool(structured_output=False)
+        async def citation_path(source_id: str, target_id: str, code: Optional[str] = None,
+                                directed: bool = True, max_hops: int = 10) -> str:
+            return await self._offload("citation_path", self.citation_path, source_id, target_id, code, directed, max_hops)
+
+        @self.mcp.tool(structured_output=False)
+        async def list_children(node: str = "", code: Optional[str] = None) -> str:
+            return await self._offload("list_children", self.list_children, node, code)
+
+        @self.mcp.tool(structured_output=False)
+        async def get_articles_under(node: str, code: Optional[str] = None, offset: int = 0,
+                                     limit: int = 50, snippet_chars: int = 0) -> str:
+            return await self._offload("get_articles_under", self.get_articles_under, node, code, offset, limit, snippet_chars)
+
+        @self.mcp.tool(structured_output=False)
+        async def get_ancestry(article_id: str, code: Optional[str] = None) -> str:
+            return await self._offload("get_ancestry", self.get_ancestry, article_id, code)
+
+        @self.mcp.tool(structured_output=False)
+        async def most_cited(code: Optional[str] = None, limit: int = 10, by: str = "in_degree") -> str:
+            return await self._offload("most_cited", self.most_cited, code, limit, by)
+
+        @self.mcp.tool(structured_output=False)
+        async def get_articles(ids: List[str], code: Optional[str] = None,
+                               fields: Optional[List[str]] = None) -> str:
+            return await self._offload("get_articles", self.get_articles, ids, code, fields)
+
+        @self.mcp.tool(structured_output=False)
+        async def search_many(queries: List[str], max_results: int = 10, code: Optional[str] = None,
+                              fields: Optional[List[str]] = None, snippet_chars: int = 0) -> str:
+            return await self._offload("search_many", self.search_many, queries, max_results, code, fields, snippet_chars)
+
+        @self.mcp.tool(structured_output=False)
+        def tool_stats() -> str:
+            return self.tool_stats()
 
     def run(self, server_type: str):
         """Run the MCP server."""
@@ -91,10 +612,48 @@ if __name__ == "__main__":
         help="Server type (sse or stdio)"
     )
     parser.add_argument(
-        "--json_path", type=str, default=os.getenv("JSON_PATH", "data/output/code_assurances.json"),
-        help="Path to JSON data file"
+        "--json_path", type=str, default=os.getenv("JSON_PATH"),
+        help="Serve a single JSON or packed (.lcpk) data file instead of every configured code"
+    )
+    parser.add_argument(
+        "--configs", type=str, default=os.getenv("CODE_CONFIGS", "configs/*.json"),
+        help="Glob of the code configs whose outputs are served"
+    )
+    parser.add_argument(
+        "--memory_budget_mb", type=float, default=os.getenv("MEMORY_BUDGET_MB"),
+        help="Evict least recently used codes once loaded codes exceed this size"
+    )
+    parser.add_argument(
+        "--query_cache_size", type=int, default=1024,
+        help="Number of search results kept in the query cache (0 disables it)"
+    )
+    parser.add_argument(
+        "--query_cache_ttl", type=float, default=300.0,
+        help="Seconds a cached search result stays valid"
+    )
+    parser.add_argument(
+        "--tool_workers", type=int, default=8,
+        help="Threads running the tools off the event loop (0 runs them on the loop)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=int(os.getenv("MCP_PORT", 8000)),
+        help="Port of the sse server"
+    )
+    parser.add_argument(
+        "--watch_interval", type=float, default=2.0,
+        help="Seconds between checks of the data files; changed codes are reloaded in the "
+             "background and swapped in (0 reloads them on the next query instead)"
     )
     args = parser.parse_args()
 
-    server = CodeServer(args.json_path)
+    if args.json_path:
+        registry = CodeRegistry.from_path(args.json_path, args.memory_budget_mb)
+    else:
+        registry = CodeRegistry.from_configs(args.configs, args.memory_budget_mb)
+    if args.watch_interval > 0:
+        registry.watch(args.watch_interval)
+    server = CodeServer(
+        registry, QueryCache(args.query_cache_size, args.query_cache_ttl),
+        tool_workers=args.tool_workers, port=args.port
+    )
     server.run(args.server_type)
\ No newline at end of file
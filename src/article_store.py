@@ -0,0 +1,362 @@
+"""Read access to processed codes, from the JSON output or the packed format.
+
+The packed format (.lcpk) is a single file in native (little-endian) byte order:
+
+    header   b"LCPK", version, article count, level count, section count
+    sections table of (name, offset, length), each section 8-byte aligned
+    strtab   deduplicated UTF-8 metadata strings + u32 offsets
+    columns  u32 string references per article (ids, hierarchy levels,
+             summaries), CSR lists for references/referenced_by/keywords,
+             i32 page numbers, u64 offsets into the content blob
+    content  UTF-8 article contents, only decoded when an article is read
+    tree     the hierarchy tree as compact JSON
+
+It is memory-mapped, so opening it only costs decoding the article ids.
+
+The streamed output (.jsonl) has one article per line, written as soon as
+the article is processed, and two companion files written afterwards:
+<stem>.backlinks.jsonl with the referenced_by, keywords and summary of each
+article (same line order) and <stem>.tree.json with the hierarchy tree.
+"""
+import json
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from array import array
+
+MAGIC = b"LCPK"
+VERSION = 1
+HEADER = struct.Struct("<4sIIII")
+SECTION = struct.Struct("<24sQQ")
+LIST_FIELDS = ("references", "referenced_by", "keywords")
+# Fields only known once the whole code has been processed.
+BACKLINK_FIELDS = ("referenced_by", "summary", "keywords")
+JSONL_ID_PREFIX = b'{"article_id": '
+_decoder = json.JSONDecoder()
+
+
+def jsonl_paths(path):
+    """Return the backlinks and hierarchy tree files of a .jsonl output."""
+    stem = os.path.splitext(path)[0]
+    return stem + ".backlinks.jsonl", stem + ".tree.json"
+
+
+class JsonArticleStore:
+    def __init__(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.articles = data["articles"]
+        self.hierarchy_tree = data.get("hierarchy_tree", {})
+        self.article_ids = [article["article_id"] for article in self.articles]
+
+    def __len__(self):
+        return len(self.articles)
+
+    def content(self, i):
+        return self.articles[i]["content"]
+
+    def iter_contents(self):
+        return (article["content"] for article in self.articles)
+
+    def references(self, i):
+        return self.articles[i]["references"]
+
+    def hierarchy(self, i):
+        return self.articles[i]["hierarchy"]
+
+    def article(self, i):
+        return self.articles[i]
+
+    def close(self):
+        pass
+
+
+def _line_offsets(mm):
+    offsets = array("Q", [0])
+    end = mm.find(b"\n")
+    while end != -1:
+        offsets.append(end + 1)
+        end = mm.find(b"\n", end + 1)
+    if offsets[-1] != len(mm):
+        offsets.append(len(mm))
+    return offsets
+
+
+def _map(path):
+    with open(path, "rb") as f:
+        # mmap cannot map empty files.
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class JsonlArticleStore:
+    """Reads a streamed output without loading it: only the article ids and
+    the line offsets of the article and backlinks files stay in memory."""
+
+    def __init__(self, path):
+        self.path = path
+        backlinks_path, self.tree_path = jsonl_paths(path)
+        self.mm = _map(path)
+        self.backlinks_mm = _map(backlinks_path)
+        self.offsets = _line_offsets(self.mm)
+        self.backlink_offsets = _line_offsets(self.backlinks_mm)
+        if len(self.offsets) != len(self.backlink_offsets):
+            raise ValueError(f"{backlinks_path} does not match {path}")
+        self.article_ids = [self._article_id(i) for i in range(len(self))]
+        self._tree = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _record(self, i):
+        return json.loads(self.mm[self.offsets[i]:self.offsets[i + 1]])
+
+    def _article_id(self, i):
+        # Lines start with the article id, so most of the line need not be decoded.
+        start = self.offsets[i] + len(JSONL_ID_PREFIX)
+        if self.mm[self.offsets[i]:start] == JSONL_ID_PREFIX:
+            head = str(self.mm[start:min(start + 256, self.offsets[i + 1])], "utf-8", "ignore")
+            try:
+                return _decoder.raw_decode(head)[0]
+            except ValueError:
+                pass
+        return self._record(i)["article_id"]
+
+    def _backlinks(self, i):
+        return json.loads(self.backlinks_mm[self.backlink_offsets[i]:self.backlink_offsets[i + 1]])
+
+    def content(self, i):
+        return self._record(i)["content"]
+
+    def iter_contents(self):
+        return (self.content(i) for i in range(len(self)))
+
+    def references(self, i):
+        return self._record(i)["references"]
+
+    def hierarchy(self, i):
+        return self._record(i)["hierarchy"]
+
+    def article(self, i):
+        article = self._record(i)
+        article.update(self._backlinks(i))
+        return {
+            "article_id": article["article_id"],
+            "content": article["content"],
+            "hierarchy": article["hierarchy"],
+            "references": article["references"],
+            "referenced_by": article["referenced_by"],
+            "summary": article["summary"],
+            "keywords": article["keywords"],
+            "page_number": article.get("page_number"),
+        }
+
+    @property
+    def hierarchy_tree(self):
+        if self._tree is None:
+            with open(self.tree_path, "r", encoding="utf-8") as f:
+                self._tree = json.load(f)
+        return self._tree
+
+    def close(self):
+        for mm in (self.mm, self.backlinks_mm):
+            if isinstance(mm, mmap.mmap):
+                mm.close()
+
+
+class PackedArticleStore:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mm)
+        magic, version, self.count, self.num_levels, num_sections = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} packed article file")
+        self.sections = {}
+        for i in range(num_sections):
+            name, offset, length = SECTION.unpack_from(self.mm, HEADER.size + i * SECTION.size)
+            self.sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+
+        self.string_offsets = self._column("strtab_offsets", "Q")
+        self.strtab_start = self.sections["strtab"][0]
+        self.content_offsets = self._column("content_offsets", "Q")
+        self.content_start = self.sections["content"][0]
+        self.level_keys = [self.string(ref) for ref in self._column("level_keys", "I")]
+        self.id_refs = self._column("ids", "I")
+        self.hierarchy_refs = self._column("hierarchy", "I")
+        self.summary_refs = self._column("summary", "I")
+        self.page_numbers = self._column("page_number", "i")
+        self.lists = {
+            field: (self._column(f"{field}_indptr", "I"), self._column(field, "I"))
+            for field in LIST_FIELDS
+        }
+        # Ids are the only per-article metadata decoded up front.
+        self.article_ids = [self.string(ref) for ref in self.id_refs]
+        self._tree = None
+
+    def _column(self, name, fmt):
+        offset, length = self.sections[name]
+        return self.buffer[offset:offset + length].cast(fmt)
+
+    def __len__(self):
+        return self.count
+
+    def string(self, ref):
+        start = self.strtab_start + self.string_offsets[ref]
+        end = self.strtab_start + self.string_offsets[ref + 1]
+        return str(self.mm[start:end], "utf-8")
+
+    def content(self, i):
+        start = self.content_start + self.content_offsets[i]
+        end = self.content_start + self.content_offsets[i + 1]
+        return str(self.mm[start:end], "utf-8")
+
+    def iter_contents(self):
+        return (self.content(i) for i in range(self.count))
+
+    def _list(self, field, i):
+        indptr, refs = self.lists[field]
+        return [self.string(ref) for ref in refs[indptr[i]:indptr[i + 1]]]
+
+    def references(self, i):
+        return self._list("references", i)
+
+    def hierarchy(self, i):
+        refs = self.hierarchy_refs[i * self.num_levels:(i + 1) * self.num_levels]
+        return {key: self.string(ref) for key, ref in zip(self.level_keys, refs)}
+
+    def article(self, i):
+        page_number = self.page_numbers[i]
+        return {
+            "article_id": self.article_ids[i],
+            "content": self.content(i),
+            "hierarchy": self.hierarchy(i),
+            "references": self._list("references", i),
+            "referenced_by": self._list("referenced_by", i),
+            "summary": self.string(self.summary_refs[i]),
+            "keywords": self._list("keywords", i),
+            "page_number": None if page_number < 0 else page_number,
+        }
+
+    @property
+    def hierarchy_tree(self):
+        if self._tree is None:
+            offset, length = self.sections["tree"]
+            self._tree = json.loads(str(self.mm[offset:offset + length], "utf-8"))
+        return self._tree
+
+    def close(self):
+        for column in [self.string_offsets, self.content_offsets, self.id_refs, self.hierarchy_refs,
+                       self.summary_refs, self.page_numbers] + [c for pair in self.lists.values() for c in pair]:
+            column.release()
+        self.buffer.release()
+        self.mm.close()
+
+
+def write_packed(path, articles, hierarchy_tree):
+    """Write articles (any iterable, read once) to the packed format.
+
+    Contents are spooled to a temporary file, so only the per-article
+    columns and the distinct metadata strings are held in memory.
+    """
+    strings = {}
+
+    def ref(value):
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    level_keys = None
+    count = 0
+    columns = {
+        "level_keys": array("I"),
+        "ids": array("I"),
+        "hierarchy": array("I"),
+        "summary": array("I"),
+        "page_number": array("i"),
+        "content_offsets": array("Q", [0]),
+    }
+    for field in LIST_FIELDS:
+        columns[f"{field}_indptr"] = array("I", [0])
+        columns[field] = array("I")
+
+    with tempfile.TemporaryFile(dir=os.path.dirname(os.path.abspath(path))) as content_file:
+        content_length = 0
+        for article in articles:
+            if level_keys is None:
+                level_keys = list(article["hierarchy"])
+                columns["level_keys"].extend(ref(key) for key in level_keys)
+            count += 1
+            columns["ids"].append(ref(article["article_id"]))
+            columns["hierarchy"].extend(ref(article["hierarchy"].get(key, "")) for key in level_keys)
+            columns["summary"].append(ref(article.get("summary") or ""))
+            page_number = article.get("page_number")
+            columns["page_number"].append(-1 if page_number is None else page_number)
+            for field in LIST_FIELDS:
+                columns[field].extend(ref(value) for value in article.get(field, []))
+                columns[f"{field}_indptr"].append(len(columns[field]))
+            encoded = article["content"].encode("utf-8")
+            content_file.write(encoded)
+            content_length += len(encoded)
+            columns["content_offsets"].append(content_length)
+
+        string_offsets = array("Q", [0])
+        encoded_strings = []
+        for value in strings:
+            encoded = value.encode("utf-8")
+            encoded_strings.append(encoded)
+            string_offsets.append(string_offsets[-1] + len(encoded))
+
+        sections = [("strtab_offsets", string_offsets.tobytes()), ("strtab", b"".join(encoded_strings))]
+        sections += [(name, column.tobytes()) for name, column in columns.items()]
+        sections += [
+            ("content", content_file),
+            ("tree", json.dumps(hierarchy_tree, ensure_ascii=False, separators=(",", ":")).encode("utf-8")),
+        ]
+
+        offset = HEADER.size + SECTION.size * len(sections)
+        table = []
+        for name, data in sections:
+            offset += -offset % 8
+            length = content_length if data is content_file else len(data)
+            table.append((name, offset, length))
+            offset += length
+
+        with open(path + ".tmp", "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, count, len(level_keys or []), len(sections)))
+            for name, section_offset, length in table:
+                f.write(SECTION.pack(name.encode("ascii"), section_offset, length))
+            for (name, data), (_, section_offset, _) in zip(sections, table):
+                f.write(b"\0" * (section_offset - f.tell()))
+                if data is content_file:
+                    content_file.seek(0)
+                    shutil.copyfileobj(content_file, f)
+                else:
+                    f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def open_article_store(path):
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+    if magic == MAGIC:
+        return PackedArticleStore(path)
+    if path.endswith(".jsonl"):
+        return JsonlArticleStore(path)
+    return JsonArticleStore(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert a processed JSON code to the packed format")
+    parser.add_argument("json_path")
+    parser.add_argument("packed_path")
+    args = parser.parse_args()
+
+    store = JsonArticleStore(args.json_path)
+    write_packed(args.packed_path, store.articles, store.hierarchy_tree)
+    print(f"Packed {len(store)} articles into {args.packed_path}")
@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# Progress bar line of the current worker process.
+_worker_slot = 0
+
+
+def _init_worker(keyword_backends, slots):
+    """Load the heavy modules and models once per worker, for every code it processes."""
+    global _worker_slot
+    with slots.get_lock():
+        _worker_slot = slots.value
+        slots.value += 1
+    from . import code_processor  # noqa: F401 (llama-index, pypdf, numpy)
+    if "nltk" in keyword_backends:
+        from nltk.tag import pos_tag
+        from nltk.tokenize import word_tokenize
+        # Loads the punkt and tagger pickles NLTK otherwise reads on first use.
+        pos_tag(word_tokenize("warm up the tagger"), lang="eng")
+
+
+def _run_code(name, config, use_cache, profile=None):
+    from .code_processor import CodeProcessor
+    start = time.perf_counter()
+    try:
+        processor = CodeProcessor(
+            config, use_cache=use_cache,
+            progress_desc=name, progress_position=_worker_slot
+        )
+        articles = processor.profile(profile) if profile else processor.process()
+        status, error = ("up to date" if articles is None else "ok"), None
+    except Exception:
+        articles, status = None, "failed"
+        error = traceback.format_exc()
+    return {
+        "code": name,
+        "status": status,
+        "articles": articles,
+        "seconds": time.perf_counter() - start,
+        "pid": os.getpid(),
+        "error": error,
+    }
+
+
+def run_batch(jobs, workers=None, use_cache=True, profile=None):
+    """Process several codes in a process pool and return one result dict per code.
+
+    jobs is a list of (name, config) pairs. A code raising an exception is
+    reported as failed without stopping the others. profile ("cprofile" or
+    "pyinstrument") profiles each code in its worker, see CodeProcessor.profile.
+    """
+    if not jobs:
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    backends = {config.get("keyword_backend", "nltk") for _, config in jobs}
+    slots = multiprocessing.Value("i", 0)
+    results = []
+    start = time.perf_counter()
+    print(f"Processing {len(jobs)} codes with {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(backends, slots)) as pool:
+        futures = {pool.submit(_run_code, name, config, use_cache, profile): name for name, config in jobs}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. killed for memory): its code and any
+                # code still queued on the broken pool are reported as failed.
+                result = {"code": name, "status": "failed", "articles": None,
+                          "seconds": None, "pid": None, "error": f"Worker crashed: {e}"}
+            results.append(result)
+            articles = "" if result["articles"] is None else f", {result['articles']} articles"
+            seconds = "" if result["seconds"] is None else f" in {result['seconds']:.1f} s"
+            print(f"[{len(results)}/{len(jobs)}] {name}: {result['status']}{seconds}{articles}")
+            if result["error"]:
+                print(result["error"])
+    failed = sum(result["status"] == "failed" for result in results)
+    print(f"Processed {len(jobs)} codes in {time.perf_counter() - start:.1f} s, {failed} failed")
+    return results
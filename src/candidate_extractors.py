@@ -0,0 +1,101 @@
+import re
+from .french import FRENCH_STOP_WORDS
+
+# Multi-word legal terms kept as a single keyword candidate.
+LEGAL_EXPRESSIONS = [
+    "responsabilité civile",
+    "responsabilité pénale",
+    "contrat d'assurance",
+    "contrat de réassurance",
+    "entreprise d'assurance",
+    "entreprises d'assurance",
+    "assurance sur la vie",
+    "assurance obligatoire",
+    "prime d'assurance",
+    "valeur de rachat",
+    "fonds de garantie",
+    "force majeure",
+    "bonne foi",
+    "mauvaise foi",
+    "ordre public",
+    "dommages et intérêts",
+    "personne morale",
+    "personnes morales",
+    "personne physique",
+    "personnes physiques",
+    "ministère public",
+    "conseil d'état",
+    "casier judiciaire",
+    "bande organisée",
+    "réclusion criminelle",
+    "détention criminelle",
+    "peine d'emprisonnement",
+    "travail d'intérêt général",
+    "sursis probatoire",
+    "mise en danger",
+    "amende forfaitaire",
+    "code des assurances",
+    "code pénal",
+    "code de procédure pénale",
+    "code de la sécurité sociale",
+    "code monétaire et financier",
+    "code de commerce",
+    "autorité de contrôle prudentiel et de résolution",
+]
+
+
+class NltkCandidateExtractor:
+    """English POS-tag filter from NLTK, kept for reproducing older outputs."""
+
+    def __init__(self, stop_words):
+        from nltk.tokenize import word_tokenize
+        from nltk.tag import pos_tag
+        self.word_tokenize = word_tokenize
+        self.pos_tag = pos_tag
+        self.stop_words = stop_words
+
+    def extract(self, content):
+        words = self.word_tokenize(content.lower())
+        tagged_words = self.pos_tag(words, lang='eng')
+        return [word for word, pos in tagged_words if pos in ('NN', 'NNS', 'NNP', 'NNPS', 'JJ', 'JJR', 'JJS') and word not in self.stop_words and len(word) > 2]
+
+
+class FrenchCandidateExtractor:
+    """Single compiled-regex pass: legal expressions first, then non stop-word words."""
+
+    def __init__(self, stop_words, expressions=None):
+        self.stop_words = FRENCH_STOP_WORDS | set(stop_words)
+        expressions = LEGAL_EXPRESSIONS if expressions is None else expressions
+        # Longest first so "code de procédure pénale" wins over "code pénal".
+        alternatives = []
+        for expression in sorted(set(expressions), key=len, reverse=True):
+            words = re.split(r"\s+", expression.lower().strip())
+            alternatives.append(r"\s+".join(re.escape(word).replace("'", "['’]") for word in words))
+        expression_re = "|".join(alternatives) or "(?!)"
+        self.token_re = re.compile(
+            rf"(?P<expression>\b(?:{expression_re})\b)|(?P<word>[^\W\d_]+(?:-[^\W\d_]+)*)"
+        )
+
+    def extract(self, content):
+        candidates = []
+        for match in self.token_re.finditer(content.lower()):
+            token = match.group()
+            if match.lastgroup == "expression":
+                candidates.append(" ".join(token.replace("’", "'").split()))
+            elif len(token) > 2 and token not in self.stop_words:
+                candidates.append(token)
+        return candidates
+
+
+CANDIDATE_EXTRACTORS = {
+    "nltk": NltkCandidateExtractor,
+    "french": FrenchCandidateExtractor,
+}
+
+
+def make_candidate_extractor(backend, stop_words, expressions=None):
+    if backend not in CANDIDATE_EXTRACTORS:
+        raise ValueError(f"Unknown keyword backend: {backend} (expected one of {', '.join(CANDIDATE_EXTRACTORS)})")
+    if backend == "french":
+        return FrenchCandidateExtractor(stop_words, expressions)
+    return CANDIDATE_EXTRACTORS[backend](stop_words)
@@ -1,26 +1,52 @@
 import json
+import os
+import time
 from collections import defaultdict
 from tqdm import tqdm
-from .pdf_text_extractor import PdfTextExtractor
+from .pdf_text_extractor import PdfTextExtractor, PageLocator
 from .text_cleaner import TextCleaner
 from .hierarchy_parser import HierarchyParser
 from .article_processor import ArticleProcessor
+from .pipeline_cache import PipelineCache, content_hash, file_hash
+from .summarizer import Summarizer, SUMMARY_PROMPT
+from .article_store import BACKLINK_FIELDS, JsonlArticleStore, jsonl_paths, write_packed
+from .reference_graph import ReferenceGraph, graph_path_for
+from .embeddings import embeddings_paths, make_embedder, write_embeddings
+from .profiler import PipelineProfiler, profile_paths, run_profiled
+
+# Bump when a change to the processing logic should invalidate existing outputs.
+OUTPUT_VERSION = 2
 
 class CodeProcessor:
-    def __init__(self, config):
+    def __init__(self, config, use_cache=True, progress_desc="Processing articles", progress_position=None):
         self.pdf_path = config["pdf_path"]
         self.txt_path = config["txt_path"]
         self.json_path = config["json_path"]
-        self.extractor = PdfTextExtractor(self.pdf_path, self.txt_path)
+        self.packed_path = config.get("packed_path")
+        self.graph_path = graph_path_for(self.json_path)
+        # "jsonl" streams articles to disk as they are processed instead of
+        # keeping the whole code in memory for a single json.dump.
+        self.output_format = config.get("output_format", "json")
+        # Per-stage timings and counters of the last process() call.
+        self.profiler = PipelineProfiler(slowest=config.get("profile_slowest", 20))
+        self.extractor = PdfTextExtractor(
+            self.pdf_path,
+            self.txt_path,
+            workers=config.get("pdf_workers", 1)
+        )
         self.cleaner = TextCleaner(config["cleaning_patterns"])
         self.parser = HierarchyParser(
             config["hierarchy_patterns"],
             config["level_keys"],
-            config["article_pattern"]
+            config["article_pattern"],
+            profiler=self.profiler
         )
         self.article_processor = ArticleProcessor(
             config["stop_words"],
-            config["llm_config"]
+            config["llm_config"],
+            keyword_backend=config.get("keyword_backend", "nltk"),
+            keyword_expressions=config.get("keyword_expressions"),
+            profiler=self.profiler
         )
         # self.hierarchy_tree = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: defaultdict(dict)))))
         def tree():
@@ -31,41 +57,318 @@ class CodeProcessor:
         self.reference_graph = defaultdict(list)
         self.all_articles = set()
         self.content_patterns = config["content_patterns"]
+        self.parser_mode = config.get("hierarchy_parser", "streaming")
+        self.summary_config = config.get("summary", {})
+        self.embedding_config = config.get("embeddings", {})
+        self.llm_config = config["llm_config"]
+        self.progress_desc = progress_desc
+        self.progress_position = progress_position
 
-    def process(self):
-        text = self.extractor.extract_text()
-        text = self.cleaner.clean_text(text)
-        
-        articles_id, articles_content, preceding_texts = self.parser.split_by_articles(text)
-        print(f"Number of articles: {len(articles_id)}")
+        self.cache = None
+        if use_cache:
+            json_stem = os.path.splitext(os.path.basename(self.json_path))[0]
+            self.cache = PipelineCache(config.get("cache_dir") or os.path.join("data", "cache", json_stem))
+        # Config values the cached artifacts of each stage depend on.
+        self.cleaning_config = config["cleaning_patterns"]
+        self.parsing_config = [config["article_pattern"], config["hierarchy_patterns"], config["level_keys"]]
+        self.article_config = [
+            config["content_patterns"], config["stop_words"],
+            config.get("keyword_backend", "nltk"), config.get("keyword_expressions")
+        ]
+
+    def _extract(self):
+        with self.profiler.stage("extraction"):
+            if self.cache is None:
+                return self.extractor.extract_text()
+            pdf_key = file_hash(self.pdf_path)
+            recorded_key = self.cache.stage_key("extraction")
+            # Without a recorded key (new or wiped cache) the text on disk is
+            # trusted and the current PDF hash recorded for it.
+            if recorded_key is not None and recorded_key != pdf_key:
+                # The raw text on disk comes from another release of the PDF.
+                self.extractor.invalidate()
+            raw_text = self.extractor.extract_text()
+            self.cache.set_stage_key("extraction", pdf_key)
+            return raw_text
 
+    def _cached_stage(self, stage, key, compute):
+        with self.profiler.stage(stage):
+            if self.cache is None:
+                return compute()
+            value = self.cache.load_stage(stage, key)
+            if value is None:
+                value = compute()
+                self.cache.save_stage(stage, key, value)
+            else:
+                print(f"Using cached {stage} stage")
+                self.profiler.mark_cached(stage)
+            return value
+
+    def _split_and_detect(self, text):
+        articles_id, articles_content, preceding_texts = self.parser.split_by_articles(text)
         prev_hierarchy = {lvl: "" for lvl in self.parser.level_keys}
-        for i, article_id in tqdm(enumerate(articles_id), desc="Processing articles"):
+        for i, article_id in enumerate(articles_id):
             preceding_text = preceding_texts[i] if i < len(preceding_texts) else ""
-            curr_hierarchy = self.parser.detect_hierarchy(preceding_text, prev_hierarchy)
-            
-            article = self.article_processor.process_article(
-                article_id, articles_content[i], curr_hierarchy, 
-                self.reference_graph, self.all_articles, self.content_patterns
-            )
-            self.articles_list.append(article)
+            with self.profiler.stage("hierarchy"):
+                curr_hierarchy = self.parser.detect_hierarchy(preceding_text, prev_hierarchy)
+            yield article_id, articles_content[i], curr_hierarchy
+            prev_hierarchy = curr_hierarchy.copy()
 
-            node = self.hierarchy_tree
-            for lvl in self.parser.level_keys[:-1]:
-                if curr_hierarchy[lvl]:
-                    node = node[curr_hierarchy[lvl]]
-            node["articles"] = node.get("articles", []) + [article_id]
+    def _iter_splits(self, text, split_key):
+        if self.parser_mode == "legacy":
+            splits = self._split_and_detect(text)
+        else:
+            splits = self.parser.iter_articles(text)
+        if self.cache is None:
+            yield from splits
+            return
 
-            prev_hierarchy = curr_hierarchy.copy()
+        cached = self.cache.iter_stream("hierarchy", split_key)
+        if cached is not None:
+            print("Using cached hierarchy stage")
+            self.profiler.mark_cached("splitting")
+            yield from cached
+            return
+        writer = self.cache.stream_writer("hierarchy")
+        try:
+            for split in splits:
+                writer.write(split)
+                yield split
+            writer.commit(split_key)
+        finally:
+            writer.abort()
+
+    def _analyze(self, content):
+        if self.cache is None:
+            return None, self.article_processor.analyze_article(content, self.content_patterns)
+        key = content_hash(content, self.article_config)
+        analysis = self.cache.get_article(key)
+        if analysis is None:
+            analysis = self.article_processor.analyze_article(content, self.content_patterns)
+            self.cache.put_article(key, analysis)
+        return key, analysis
+
+    def _iter_articles(self, text, split_key, page_locator, article_keys):
+        # Articles are processed as the parser yields them.
+        splits = self.profiler.iter_stage("splitting", self._iter_splits(text, split_key))
+        start = time.perf_counter()
+        for article_id, content, curr_hierarchy in tqdm(splits, desc=self.progress_desc, position=self.progress_position):
+            with self.profiler.stage("analysis"):
+                key, analysis = self._analyze(content)
+            article_keys.append(key)
+            with self.profiler.stage("assembly"):
+                article = self.article_processor.process_article(
+                    article_id, content, curr_hierarchy,
+                    self.reference_graph, self.all_articles, self.content_patterns,
+                    page_number=page_locator.locate(article_id),
+                    analysis=analysis
+                )
+
+                node = self.hierarchy_tree
+                for lvl in self.parser.level_keys[:-1]:
+                    if curr_hierarchy[lvl]:
+                        node = node[curr_hierarchy[lvl]]
+                node.setdefault("articles", []).append(article_id)
+            # From asking the parser for the article to handing it over.
+            self.profiler.record_article(article_id, time.perf_counter() - start)
+            yield article
+            start = time.perf_counter()
 
+    def _make_summarizer(self):
+        return Summarizer(
+            self.article_processor.llm,
+            self.llm_config["model"],
+            self.summary_config.get("cache_path", os.path.join("data", "cache", "summaries.sqlite")),
+            concurrency=self.summary_config.get("concurrency", 4),
+            retries=self.summary_config.get("retries", 3)
+        )
+
+    def _write_json(self, articles):
+        self.articles_list = list(articles)
+        print(f"Number of articles: {len(self.articles_list)}")
+        with self.profiler.stage("keyword_scoring"):
+            self.article_processor.assign_keywords(self.articles_list)
         for article in self.articles_list:
             article["referenced_by"] = self.reference_graph.get(article["article_id"], [])
 
+        summaries_failed = 0
+        if self.summary_config.get("enabled"):
+            with self.profiler.stage("summarization"):
+                summaries_failed = self._make_summarizer().summarize(self.articles_list)["failed"]
+
         output = {
             "articles": self.articles_list,
             "hierarchy_tree": dict(self.hierarchy_tree)
         }
-        with open(self.json_path, "w", encoding="utf-8") as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
-        
-        print(f"Data saved to {self.json_path}")
\ No newline at end of file
+        with self.profiler.stage("serialization"):
+            # Replaced in one step, so a server watching the file never reads half of it.
+            with open(self.json_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(output, f, ensure_ascii=False, indent=2)
+            os.replace(self.json_path + ".tmp", self.json_path)
+            if self.packed_path:
+                write_packed(self.packed_path, self.articles_list, output["hierarchy_tree"])
+                print(f"Packed data saved to {self.packed_path}")
+        article_ids = [article["article_id"] for article in self.articles_list]
+        references = [article["references"] for article in self.articles_list]
+        return article_ids, references, summaries_failed
+
+    def _write_jsonl(self, articles, chunk_size=1024):
+        # First pass: each article goes to disk as soon as it is processed,
+        # without the fields that need the whole code.
+        article_ids = []
+        references = []
+        with open(self.json_path + ".tmp", "w", encoding="utf-8") as f:
+            for article in articles:
+                article_ids.append(article["article_id"])
+                references.append(article["references"])
+                with self.profiler.stage("serialization"):
+                    line = {name: value for name, value in article.items() if name not in BACKLINK_FIELDS}
+                    f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        print(f"Number of articles: {len(article_ids)}")
+
+        # Second pass: back-links, keywords and summaries, one line per article.
+        backlinks_path, tree_path = jsonl_paths(self.json_path)
+        with self.profiler.stage("keyword_scoring"):
+            keywords = self.article_processor.keyword_scorer.top_keywords()
+        summarizer = self._make_summarizer() if self.summary_config.get("enabled") else None
+        summaries_failed = 0
+        with self.profiler.stage("serialization"), \
+                open(self.json_path + ".tmp", "r", encoding="utf-8") as articles_file, \
+                open(backlinks_path + ".tmp", "w", encoding="utf-8") as f:
+            for start in range(0, len(article_ids), chunk_size):
+                chunk = []
+                for i in range(start, min(start + chunk_size, len(article_ids))):
+                    chunk.append({
+                        "referenced_by": self.reference_graph.get(article_ids[i], []),
+                        "summary": "",
+                        "keywords": keywords[i],
+                    })
+                if summarizer is not None:
+                    contents = [json.loads(articles_file.readline())["content"] for _ in chunk]
+                    with_content = [dict(links, content=content) for links, content in zip(chunk, contents)]
+                    with self.profiler.stage("summarization"):
+                        summaries_failed += summarizer.summarize(with_content)["failed"]
+                    for links, summarized in zip(chunk, with_content):
+                        links["summary"] = summarized["summary"]
+                for links in chunk:
+                    f.write(json.dumps(links, ensure_ascii=False) + "\n")
+        with self.profiler.stage("serialization"):
+            with open(tree_path, "w", encoding="utf-8") as f:
+                json.dump(self.hierarchy_tree, f, ensure_ascii=False)
+            os.replace(backlinks_path + ".tmp", backlinks_path)
+            os.replace(self.json_path + ".tmp", self.json_path)
+
+            if self.packed_path:
+                store = JsonlArticleStore(self.json_path)
+                write_packed(self.packed_path, (store.article(i) for i in range(len(store))), store.hierarchy_tree)
+                store.close()
+                print(f"Packed data saved to {self.packed_path}")
+        return article_ids, references, summaries_failed
+
+    def _iter_output_contents(self):
+        if self.output_format == "jsonl":
+            store = JsonlArticleStore(self.json_path)
+            try:
+                yield from store.iter_contents()
+            finally:
+                store.close()
+        else:
+            for article in self.articles_list:
+                yield article["content"]
+
+    def _embed(self, count, embedding_key):
+        if self.cache is not None and all(map(os.path.exists, embeddings_paths(self.json_path))) \
+                and self.cache.stage_key("embeddings") == embedding_key:
+            print("Using cached embeddings stage")
+            return
+        embedder = make_embedder(self.embedding_config)
+        write_embeddings(
+            self.json_path, self._iter_output_contents, count, embedder,
+            batch_size=self.embedding_config.get("batch_size", 256)
+        )
+        print(f"Embeddings ({embedder.backend}, {embedder.dim} dimensions) saved to {embeddings_paths(self.json_path)[0]}")
+        if self.cache is not None:
+            self.cache.set_stage_key("embeddings", embedding_key)
+
+    def process(self):
+        """Run the pipeline; return the number of articles written, or None if outputs were up to date.
+
+        Either way the stage report is written to <stem>.profile.json.
+        """
+        raw_text = self._extract()
+        clean_key = content_hash(raw_text, self.cleaning_config)
+        split_key = content_hash(clean_key, self.parsing_config)
+        summary_key = [self.llm_config, SUMMARY_PROMPT] if self.summary_config.get("enabled") else None
+        embedding_key = content_hash(split_key, self.article_config, self.embedding_config) \
+            if self.embedding_config.get("enabled") else None
+        output_key = content_hash(OUTPUT_VERSION, split_key, self.article_config, summary_key, self.output_format, embedding_key)
+        outputs = [self.json_path, self.graph_path] + ([self.packed_path] if self.packed_path else [])
+        if self.output_format == "jsonl":
+            outputs += jsonl_paths(self.json_path)
+        if embedding_key:
+            outputs += embeddings_paths(self.json_path)
+        if self.cache is not None and all(map(os.path.exists, outputs)) and self.cache.stage_key("output") == output_key:
+            print(f"{self.json_path} is up to date")
+            self.cache.close()
+            self.profiler.skipped = "outputs up to date"
+            self._save_report()
+            return None
+
+        text = self._cached_stage("cleaning", clean_key, lambda: self.cleaner.clean_text(raw_text))
+        page_locator = PageLocator(raw_text, self.extractor.page_offsets)
+
+        article_keys = []
+        articles = self._iter_articles(text, split_key, page_locator, article_keys)
+        if self.output_format == "jsonl":
+            article_ids, references, summaries_failed = self._write_jsonl(articles)
+        else:
+            article_ids, references, summaries_failed = self._write_json(articles)
+
+        with self.profiler.stage("reference_graph"):
+            graph = ReferenceGraph.build(article_ids, references)
+            graph.save(self.graph_path)
+        print(f"Reference graph ({len(graph.out_indices)} citations) saved to {self.graph_path}")
+        if embedding_key:
+            with self.profiler.stage("embeddings"):
+                self._embed(len(article_ids), embedding_key)
+
+        self.profiler.count("articles", len(article_ids))
+        self.profiler.count("references", len(graph.out_indices))
+        self.profiler.count("summaries_failed", summaries_failed)
+        if not self.profiler.stages["cleaning"].get("cached"):
+            self.profiler.record_regex("cleaning", self.cleaning_config, self.cleaner.match_counts)
+        if not self.profiler.stages.get("splitting", {}).get("cached"):
+            self.profiler.record_regex(
+                "hierarchy",
+                [self.parser.article_pattern] + self.parser.patterns,
+                [self.parser.article_matches] + self.parser.match_counts
+            )
+        if self.cache is not None:
+            self.profiler.count("article_cache_hits", self.cache.hits)
+            self.profiler.count("article_cache_misses", self.cache.misses)
+            print(f"Article cache: {self.cache.hits} hits, {self.cache.misses} misses")
+            self.cache.prune_articles(article_keys)
+            if not summaries_failed:
+                # Leave failed summaries to be retried on the next run.
+                self.cache.set_stage_key("output", output_key)
+            self.cache.close()
+        print(f"Data saved to {self.json_path}")
+        self._save_report()
+        return len(article_ids)
+
+    def _save_report(self):
+        report_path = profile_paths(self.json_path)[0]
+        self.profiler.save(report_path)
+        print(f"Stage report saved to {report_path}")
+
+    def profile(self, backend="cprofile"):
+        """Run process() under cProfile or pyinstrument.
+
+        Writes the profiler dump next to the output, prints the stage timings
+        and returns process()'s result.
+        """
+        dump_path = profile_paths(self.json_path, backend)[1]
+        result = run_profiled(self.process, backend, dump_path)
+        print(f"Stage timings ({backend} profile saved to {dump_path}):")
+        print(self.profiler.summary())
+        return result
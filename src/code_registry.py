@@ -0,0 +1,329 @@
+import glob
+import json
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from .article_store import JsonArticleStore, jsonl_paths, open_article_store
+from .embeddings import EmbeddingIndex, embeddings_paths
+from .french import fold
+from .hierarchy_index import HierarchyIndex
+from .reference_graph import ReferenceGraph, graph_path_for
+from .search_index import SearchIndex, normalize_article_id
+
+logger = logging.getLogger(__name__)
+
+# Rough per-item costs of the in-memory structures, used to keep the loaded
+# codes under the memory budget without measuring the process.
+JSON_BYTES_FACTOR = 2
+POSTING_BYTES = 128
+POSITION_BYTES = 24
+ARTICLE_ID_BYTES = 200
+
+
+def file_signature(path):
+    """(mtime, size) of a data file, to notice when it has been replaced."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def output_signature(path):
+    """Signatures of a data file and of the sidecar files loaded with it.
+
+    Missing sidecars count as None, so adding or replacing any of them
+    changes the signature as well.
+    """
+    paths = [path, graph_path_for(path), *embeddings_paths(path)]
+    if path.endswith(".jsonl"):
+        paths += jsonl_paths(path)
+    return tuple(file_signature(p) if os.path.exists(p) else None for p in paths)
+
+
+def code_key(text):
+    return re.sub(r"[^a-z0-9]+", "_", fold(text)).strip("_")
+
+
+class LoadedCode:
+    """The article store, search index, reference graph, hierarchy index and
+    (when the pipeline computed them) embeddings of one processed code."""
+
+    def __init__(self, name, title, path):
+        self.name = name
+        self.title = title
+        self.path = path
+        self.signature = output_signature(path)
+        self.store = open_article_store(path)
+        self.search_index = SearchIndex(
+            self.store.article_ids, self.store.iter_contents(),
+            references=(self.store.references(i) for i in range(len(self.store)))
+        )
+        self.graph = self._load_graph()
+        hierarchies = [self.store.hierarchy(i) for i in range(len(self.store))]
+        self.hierarchy = HierarchyIndex(hierarchies[0] if hierarchies else [], hierarchies)
+        self.embeddings = self._load_embeddings()
+        self.size_bytes = self._estimate_bytes()
+
+    def _load_graph(self):
+        graph_path = graph_path_for(self.path)
+        if os.path.exists(graph_path):
+            graph = ReferenceGraph.load(graph_path)
+            if graph.num_nodes == len(self.store):
+                return graph
+            logger.warning(f"{graph_path} does not match {self.path}, rebuilding it in memory")
+        return ReferenceGraph.build(
+            self.store.article_ids, (self.store.references(i) for i in range(len(self.store)))
+        )
+
+    def _load_embeddings(self):
+        try:
+            embeddings = EmbeddingIndex.load(self.path)
+        except Exception as e:
+            logger.warning(f"Embeddings of {self.name} unavailable: {e}")
+            return None
+        if embeddings is not None and len(embeddings) != len(self.store):
+            logger.warning(f"Embeddings of {self.name} do not match {self.path}, semantic search disabled")
+            return None
+        return embeddings
+
+    def find(self, article_id):
+        """Return the docs of an article id, written as in search queries ("l113-2", "Article L113-2")."""
+        return self.search_index.id_index.get(normalize_article_id(article_id), [])
+
+    def _estimate_bytes(self):
+        size = ARTICLE_ID_BYTES * len(self.store) + self.graph.nbytes
+        if isinstance(self.store, JsonArticleStore):
+            # Packed stores are memory-mapped; their pages are reclaimable.
+            size += JSON_BYTES_FACTOR * os.path.getsize(self.path)
+        for docs in self.search_index.postings.values():
+            size += POSTING_BYTES * len(docs)
+            size += POSITION_BYTES * sum(len(positions) for positions in docs.values())
+        return size
+
+
+class CodeRegistry:
+    """Processed codes by name, loaded on first use.
+
+    The least recently used codes are dropped once the loaded ones exceed
+    memory_budget_mb; the code being requested is always kept. Queries over
+    every code go through within_budget(), so they do not evict and rebuild
+    codes on each call. A code is
+    built outside the registry lock, under a lock of its own, so only the
+    callers asking for that code wait while it loads.
+
+    A code whose files change on disk is reloaded by get() before it is
+    returned, unless watch() is running: then a background thread polls
+    the files, rebuilds a changed code once its files have stopped
+    changing, and swaps the new LoadedCode in. Queries keep being served
+    from the previous one meanwhile, and requests already holding it
+    finish against it.
+    """
+
+    def __init__(self, sources, memory_budget_mb=None):
+        # sources: {name: (title, path)}
+        self.sources = dict(sources)
+        self.memory_budget = memory_budget_mb * 1024 * 1024 if memory_budget_mb else None
+        self.loaded = OrderedDict()
+        self.lock = threading.Lock()
+        self.loading = {name: threading.Lock() for name in self.sources}
+        # Estimated size of each code the last time it was loaded.
+        self.sizes = {}
+        self.watcher = None
+        self.stop_event = threading.Event()
+        # Signatures seen on the previous poll, and those whose reload failed.
+        self.pending = {}
+        self.failed = {}
+        self.reloads = 0
+
+    @classmethod
+    def from_configs(cls, pattern, memory_budget_mb=None):
+        sources = {}
+        for config_path in sorted(glob.glob(pattern)):
+            with open(config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            name = os.path.splitext(os.path.basename(config_path))[0]
+            # Prefer the packed output, it opens without decoding every article.
+            paths = [config.get("packed_path"), config.get("json_path")]
+            path = next((p for p in paths if p and os.path.exists(p)), None)
+            if path is None:
+                logger.warning(f"Skipping {config_path}: no processed output found")
+                continue
+            sources[name] = (config.get("code_name", name), path)
+        if not sources:
+            raise FileNotFoundError(f"No processed codes found for {pattern}")
+        return cls(sources, memory_budget_mb)
+
+    @classmethod
+    def from_path(cls, path, memory_budget_mb=None):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Data file not found: {path}")
+        name = os.path.splitext(os.path.basename(path))[0]
+        return cls({name: (name, path)}, memory_budget_mb)
+
+    def names(self):
+        return list(self.sources)
+
+    def resolve(self, code):
+        """Return the registry name for a code name or title, or None."""
+        key = code_key(code)
+        for name, (title, _) in self.sources.items():
+            if key in (name, code_key(title)):
+                return name
+        return None
+
+    def describe(self):
+        # Lock-free: a single get() per code cannot see the dict half updated.
+        described = []
+        for name, (title, _) in self.sources.items():
+            code = self.loaded.get(name)
+            described.append({
+                "code": name,
+                "title": title,
+                "loaded": code is not None,
+                "articles": len(code.store) if code is not None else None,
+            })
+        return described
+
+    def _load(self, name):
+        title, path = self.sources[name]
+        try:
+            code = LoadedCode(name, title, path)
+        except Exception as e:
+            logger.error(f"Error loading {name} from {path}: {e}")
+            raise
+        self.sizes[name] = code.size_bytes
+        logger.info(f"Loaded {name} from {path}: {len(code.store)} articles, "
+                    f"{len(code.search_index.postings)} terms, ~{code.size_bytes / 1e6:.1f} MB")
+        return code
+
+    def _current(self, name):
+        """The loaded code if it can be served as is, else None. Called with the lock held."""
+        code = self.loaded.get(name)
+        if code is None:
+            return None
+        if self.watcher is not None:
+            self.loaded.move_to_end(name)
+            return code
+        try:
+            if output_signature(self.sources[name][1]) != code.signature:
+                return None
+        except OSError:
+            # Being replaced right now: keep serving the loaded copy.
+            return code
+        self.loaded.move_to_end(name)
+        return code
+
+    def get(self, name):
+        with self.lock:
+            code = self._current(name)
+        if code is not None:
+            return code
+        with self.loading[name]:
+            # Another caller may have loaded it while this one waited.
+            with self.lock:
+                code = self._current(name)
+                if code is None and name in self.loaded:
+                    logger.info(f"{self.sources[name][1]} changed on disk, reloading {name}")
+            if code is not None:
+                return code
+            code = self._load(name)
+            with self.lock:
+                self.loaded[name] = code
+                self.loaded.move_to_end(name)
+                self._evict()
+            return code
+
+    def resident_first(self, names):
+        """Return names with the codes currently loaded first."""
+        loaded = [name for name in names if self.loaded.get(name) is not None]
+        return loaded + [name for name in names if name not in loaded]
+
+    def within_budget(self, names):
+        """Return (codes, skipped): the codes of names that fit in memory together.
+
+        Loaded codes come first; each other code is loaded only if its size
+        (from its last load) fits next to them under the memory budget, and
+        is skipped otherwise. A code never loaded is loaded once to learn its
+        size. Without a budget every code is returned.
+        """
+        codes, skipped, total = [], [], 0
+        for name in self.resident_first(names):
+            size = self.sizes.get(name)
+            if (self.memory_budget is not None and codes and self.loaded.get(name) is None
+                    and size is not None and total + size > self.memory_budget):
+                skipped.append(name)
+                continue
+            code = self.get(name)
+            codes.append(code)
+            total += code.size_bytes
+        return codes, skipped
+
+    def check_for_updates(self):
+        """Reload, outside the lock, the loaded codes whose files changed; return their names.
+
+        A code is reloaded once the same new signature has been seen on two
+        consecutive calls, so a file still being written is not read.
+        """
+        with self.lock:
+            loaded = list(self.loaded.items())
+        reloaded = []
+        for name, code in loaded:
+            try:
+                signature = output_signature(self.sources[name][1])
+            except OSError:
+                continue
+            if signature == code.signature or signature == self.failed.get(name):
+                self.pending.pop(name, None)
+                continue
+            if self.pending.get(name) != signature:
+                self.pending[name] = signature
+                continue
+            del self.pending[name]
+            logger.info(f"{self.sources[name][1]} changed on disk, reloading {name} in the background")
+            try:
+                new_code = self._load(name)
+            except Exception:
+                self.failed[name] = signature
+                continue
+            with self.lock:
+                # Not swapped in if the code was evicted in the meantime.
+                if self.loaded.get(name) is code:
+                    self.loaded[name] = new_code
+                    self._evict()
+                    self.reloads += 1
+                    reloaded.append(name)
+        return reloaded
+
+    def watch(self, interval=2.0):
+        """Poll the files of the loaded codes every interval seconds in a daemon thread."""
+        if self.watcher is not None:
+            return
+
+        def run():
+            while not self.stop_event.wait(interval):
+                try:
+                    self.check_for_updates()
+                except Exception:
+                    logger.exception("Error while checking the data files for updates")
+
+        self.stop_event.clear()
+        self.watcher = threading.Thread(target=run, name="code-watcher", daemon=True)
+        self.watcher.start()
+        logger.info(f"Watching the data files every {interval} s")
+
+    def stop_watching(self):
+        if self.watcher is None:
+            return
+        self.stop_event.set()
+        self.watcher.join()
+        self.watcher = None
+
+    def _evict(self):
+        if self.memory_budget is None:
+            return
+        total = sum(code.size_bytes for code in self.loaded.values())
+        while total > self.memory_budget and len(self.loaded) > 1:
+            # Requests still holding the evicted code keep it alive until they finish.
+            name, code = self.loaded.popitem(last=False)
+            total -= code.size_bytes
+            logger.info(f"Evicted {name} to stay under the memory budget")
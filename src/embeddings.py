@@ -0,0 +1,217 @@
+"""Article embeddings for semantic search.
+
+Embeddings come from a local sentence-transformers model when one is
+configured and installed, otherwise from a hashing vectorizer (folded and
+stemmed words plus their character 4-grams, hashed into a fixed number of
+signed buckets, log-scaled and weighted by bucket IDF). Either way rows are
+L2-normalised, so cosine similarity is a dot product.
+
+The matrix is stored as float32 <stem>.embeddings.npy next to the output and
+memory-mapped by the server; <stem>.embeddings.json describes how to embed
+queries the same way.
+"""
+import json
+import os
+import zlib
+import numpy as np
+from .french import analyze
+
+NGRAM = 4
+NGRAM_WEIGHT = 0.25
+_models = {}
+
+
+def embeddings_paths(data_path):
+    """Return the matrix and metadata files of a code's embeddings."""
+    stem = os.path.splitext(data_path)[0]
+    return stem + ".embeddings.npy", stem + ".embeddings.json"
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class HashingEmbedder:
+    backend = "hashing"
+
+    def __init__(self, dim=1024, idf=None):
+        self.dim = dim
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float32)
+        self._features = {}
+
+    def _term_features(self, term):
+        features = self._features.get(term)
+        if features is None:
+            marked = f"<{term}>"
+            names = [term] + [marked[i:i + NGRAM] for i in range(max(1, len(marked) - NGRAM + 1))]
+            hashes = [zlib.crc32(name.encode("utf-8")) for name in names]
+            weights = [1.0] + [NGRAM_WEIGHT] * (len(names) - 1)
+            features = (
+                np.array([h % self.dim for h in hashes], dtype=np.int64),
+                np.array([w if h & 0x80000000 else -w for h, w in zip(hashes, weights)], dtype=np.float32),
+            )
+            self._features[term] = features
+        return features
+
+    def _counts(self, text):
+        features = [self._term_features(term) for _, term in analyze(text)]
+        if not features:
+            return np.zeros(self.dim, dtype=np.float32)
+        indices = np.concatenate([f[0] for f in features])
+        weights = np.concatenate([f[1] for f in features])
+        counts = np.bincount(indices, weights=weights, minlength=self.dim)
+        return (np.sign(counts) * np.log1p(np.abs(counts))).astype(np.float32)
+
+    def fit(self, texts):
+        df = np.zeros(self.dim, dtype=np.float64)
+        num_docs = 0
+        for text in texts:
+            df += self._counts(text) != 0
+            num_docs += 1
+        self.idf = (np.log((num_docs + 1) / (df + 1)) + 1).astype(np.float32)
+
+    def encode(self, texts):
+        matrix = np.stack([self._counts(text) for text in texts]) if texts else np.zeros((0, self.dim), np.float32)
+        if self.idf is not None:
+            matrix *= self.idf
+        return _normalize(matrix).astype(np.float32)
+
+    def meta(self):
+        return {"backend": self.backend, "dim": self.dim, "idf": self.idf.tolist()}
+
+
+class SentenceTransformerEmbedder:
+    backend = "sentence-transformers"
+
+    def __init__(self, model, batch_size=32):
+        from sentence_transformers import SentenceTransformer
+        # Loaded once per process and shared by every code using the model.
+        if model not in _models:
+            _models[model] = SentenceTransformer(model, device="cpu")
+        self.model_name = model
+        self.model = _models[model]
+        self.batch_size = batch_size
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def fit(self, texts):
+        pass
+
+    def encode(self, texts):
+        return self.model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+    def meta(self):
+        return {"backend": self.backend, "dim": self.dim, "model": self.model_name}
+
+
+def make_embedder(config):
+    """Embedder for an "embeddings" config section.
+
+    backend "auto" uses the configured sentence-transformers model when it
+    can be loaded and falls back to hashing otherwise.
+    """
+    backend = config.get("backend", "auto")
+    if backend in ("auto", "sentence-transformers") and config.get("model"):
+        try:
+            return SentenceTransformerEmbedder(config["model"], config.get("model_batch_size", 32))
+        except Exception as e:
+            if backend != "auto":
+                raise
+            print(f"Embedding model {config['model']} unavailable ({e}), using the hashing vectorizer")
+    elif backend not in ("auto", "hashing"):
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    return HashingEmbedder(config.get("dim", 1024))
+
+
+def embedder_from_meta(meta):
+    if meta["backend"] == "hashing":
+        return HashingEmbedder(meta["dim"], meta["idf"])
+    return SentenceTransformerEmbedder(meta["model"])
+
+
+def write_embeddings(data_path, contents, count, embedder, batch_size=256):
+    """Embed count article contents into the files of data_path.
+
+    contents is a callable returning a fresh iterator over the contents, as
+    the hashing vectorizer reads them twice (IDF, then vectors). Rows are
+    written to a memory-mapped file batch by batch.
+    """
+    matrix_path, meta_path = embeddings_paths(data_path)
+    embedder.fit(contents())
+    matrix = np.lib.format.open_memmap(matrix_path + ".tmp", mode="w+", dtype=np.float32, shape=(count, embedder.dim))
+    row = 0
+    batch = []
+    for content in contents():
+        batch.append(content)
+        if len(batch) == batch_size:
+            matrix[row:row + len(batch)] = embedder.encode(batch)
+            row += len(batch)
+            batch = []
+    if batch:
+        matrix[row:row + len(batch)] = embedder.encode(batch)
+        row += len(batch)
+    matrix.flush()
+    del matrix
+    if row != count:
+        os.remove(matrix_path + ".tmp")
+        raise ValueError(f"Expected {count} articles to embed, got {row}")
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(embedder.meta(), f)
+    os.replace(matrix_path + ".tmp", matrix_path)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+class EmbeddingIndex:
+    """Top-k cosine search over a (memory-mapped) embedding matrix."""
+
+    def __init__(self, matrix, embedder, block_rows=65536):
+        self.matrix = matrix
+        self.embedder = embedder
+        self.block_rows = block_rows
+
+    @classmethod
+    def load(cls, data_path):
+        """Return the index of a code's embeddings, or None when there are none."""
+        matrix_path, meta_path = embeddings_paths(data_path)
+        if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(np.load(matrix_path, mmap_mode="r"), embedder_from_meta(meta))
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def search_vectors(self, vectors, k=10):
+        """Return, for each query vector, [(doc, cosine)] of its k nearest articles."""
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in vectors]
+        best_docs = np.zeros((len(vectors), 0), dtype=np.int64)
+        best_scores = np.zeros((len(vectors), 0), dtype=np.float32)
+        # Blocks keep the score matrix small for very large codes.
+        for start in range(0, len(self), self.block_rows):
+            scores = vectors @ np.asarray(self.matrix[start:start + self.block_rows]).T
+            top = min(k, scores.shape[1])
+            candidates = np.argpartition(-scores, top - 1, axis=1)[:, :top]
+            best_docs = np.hstack([best_docs, candidates + start])
+            best_scores = np.hstack([best_scores, np.take_along_axis(scores, candidates, axis=1)])
+            if best_docs.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_docs = np.take_along_axis(best_docs, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_docs = np.take_along_axis(best_docs, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        return [
+            [(int(doc), float(score)) for doc, score in zip(docs, scores)]
+            for docs, scores in zip(best_docs, best_scores)
+        ]
+
+    def search_many(self, queries, k=10):
+        return self.search_vectors(self.embedder.encode(list(queries)), k)
+
+    def search(self, query, k=10):
+        return self.search_many([query], k)[0]
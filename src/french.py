@@ -0,0 +1,45 @@
+import re
+import unicodedata
+
+# Common French function words, accented as they appear in the codes.
+FRENCH_STOP_WORDS = frozenset("""
+a à afin ai aient ait alors au aucun aucune aupres auprès aussi autre autres aux avait avant avec avoir
+c ce ceci cela celle celles celui ces cet cette ceux chacun chacune chaque ci comme comment d dans de
+depuis des dès donc dont du elle elles en entre est et été être eu fait faire fois hors il ils j je jusqu
+l la laquelle le lequel les lesquelles lesquels leur leurs lors lorsqu lorsque lui m ma mais me même mêmes
+mes moins n ne ni non nos notre nous on ont ou où par parmi pas peu peut peuvent plus pour pourra
+puisqu qu quand que quel quelle quelles quels qui quoi quoiqu s sa sans se selon ses seul seule si sien soit son
+sont sous sur t ta te tel telle telles tels tes toi ton tous tout toute toutes très tu un une vers
+vos votre vous y
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def fold(text):
+    """Lowercase and strip accents so that "Sinistré" and "sinistre" compare equal."""
+    text = text.lower().replace("œ", "oe").replace("æ", "ae")
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+
+
+FOLDED_STOP_WORDS = frozenset(fold(word) for word in FRENCH_STOP_WORDS)
+
+
+def light_stem(token):
+    # Plural stripping only: aggressive stemming hurts precision on legal terms.
+    if len(token) > 3 and token[-1] in "sx" and token[-2] != "s":
+        return token[:-1]
+    return token
+
+
+def analyze(text):
+    """Fold and tokenize text into (position, term) pairs, skipping stop words.
+
+    Positions count stop words too, so phrase queries keep their gaps.
+    """
+    terms = []
+    for position, match in enumerate(TOKEN_RE.finditer(fold(text))):
+        token = match.group()
+        if token not in FOLDED_STOP_WORDS:
+            terms.append((position, light_stem(token)))
+    return terms
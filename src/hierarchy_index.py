@@ -0,0 +1,163 @@
+import bisect
+import re
+from array import array
+from .french import fold
+
+PATH_SEPARATOR = " > "
+
+
+def heading_key(title):
+    """Folded heading number of a title: "Livre II : Des crimes..." -> "livre ii"."""
+    return folded_title(title.split(":")[0])
+
+
+def folded_title(title):
+    return " ".join(fold(title).split())
+
+
+class HierarchyIndex:
+    """The hierarchy tree of a code, with the articles under each node.
+
+    Built from the hierarchy of every article in document order. Node 0 is
+    the root; the articles under a node are kept as runs of consecutive
+    article positions (a single run unless a heading reappears later), with
+    cumulative counts so any page of them is found by bisection.
+    """
+
+    def __init__(self, level_keys, hierarchies):
+        self.level_keys = list(level_keys)
+        self.titles = [""]
+        self.levels = [None]
+        self.parents = [-1]
+        self.depths = [0]
+        self.children = [[]]
+        self.runs = [[]]
+        self.node_ids = {(): 0}
+        self.article_nodes = array("I")
+        paths = [()]
+        for doc, hierarchy in enumerate(hierarchies):
+            path = ()
+            node = 0
+            self._extend_run(0, doc)
+            for level in self.level_keys:
+                title = hierarchy.get(level)
+                if not title:
+                    continue
+                path += (title,)
+                child = self.node_ids.get(path)
+                if child is None:
+                    child = len(self.titles)
+                    self.node_ids[path] = child
+                    self.titles.append(title)
+                    self.levels.append(level)
+                    self.parents.append(node)
+                    self.depths.append(len(path))
+                    self.children.append([])
+                    self.runs.append([])
+                    self.children[node].append(child)
+                    paths.append(path)
+                node = child
+                self._extend_run(node, doc)
+            self.article_nodes.append(node)
+
+        self.path_strings = [PATH_SEPARATOR.join(path) for path in paths]
+        self.by_path_string = {path: node for node, path in enumerate(self.path_strings)}
+        self.by_heading = {}
+        for node in range(1, len(self.titles)):
+            self.by_heading.setdefault(heading_key(self.titles[node]), []).append(node)
+        # Folded titles in sorted order, so title prefixes are found by bisection.
+        by_title = sorted((folded_title(self.titles[node]), node) for node in range(1, len(self.titles)))
+        self.sorted_titles = [title for title, _ in by_title]
+        self.sorted_title_nodes = [node for _, node in by_title]
+        self.run_offsets = []
+        for runs in self.runs:
+            offsets = [0]
+            for start, stop in runs:
+                offsets.append(offsets[-1] + stop - start)
+            self.run_offsets.append(offsets)
+
+    def _extend_run(self, node, doc):
+        runs = self.runs[node]
+        if runs and runs[-1][1] == doc:
+            runs[-1][1] = doc + 1
+        else:
+            runs.append([doc, doc + 1])
+
+    def __len__(self):
+        return len(self.titles)
+
+    def count(self, node):
+        return self.run_offsets[node][-1]
+
+    def is_ancestor(self, ancestor, node):
+        while self.depths[node] > self.depths[ancestor]:
+            node = self.parents[node]
+        return node == ancestor
+
+    def resolve(self, path):
+        """Return the node for a path, or None.
+
+        The path is either a path string returned by this index or headings
+        separated by ">" or ",", e.g. "Livre II, Titre III". Headings match a
+        title or its number ("Livre II") and may skip intermediate levels.
+        """
+        path = path.strip()
+        if not path:
+            return 0
+        if path in self.by_path_string:
+            return self.by_path_string[path]
+        node = 0
+        for segment in re.split(r"\s*[>,]\s*", path):
+            if not segment:
+                continue
+            key = folded_title(segment)
+            candidates = self.by_heading.get(key) or self._title_prefix_matches(key)
+            # The first matching heading below the current node, in document order.
+            matches = [n for n in candidates if self.is_ancestor(node, n) and n != node]
+            if not matches:
+                return None
+            node = min(matches, key=lambda n: (self.runs[n][0][0], self.depths[n]))
+        return node
+
+    def _title_prefix_matches(self, prefix):
+        nodes = []
+        i = bisect.bisect_left(self.sorted_titles, prefix)
+        while i < len(self.sorted_titles) and self.sorted_titles[i].startswith(prefix):
+            nodes.append(self.sorted_title_nodes[i])
+            i += 1
+        return nodes
+
+    def articles(self, node, offset=0, limit=None):
+        """Return the article positions under node, from offset, at most limit of them."""
+        offsets = self.run_offsets[node]
+        total = offsets[-1]
+        stop = total if limit is None else min(total, offset + limit)
+        docs = []
+        run = bisect.bisect_right(offsets, offset) - 1
+        position = offset
+        while position < stop and run < len(self.runs[node]):
+            start, run_stop = self.runs[node][run]
+            first = start + position - offsets[run]
+            take = min(run_stop - first, stop - position)
+            docs.extend(range(first, first + take))
+            position += take
+            run += 1
+        return docs
+
+    def ancestry(self, doc):
+        """Return the nodes from the top level down to the deepest heading of an article."""
+        nodes = []
+        node = self.article_nodes[doc]
+        while node > 0:
+            nodes.append(node)
+            node = self.parents[node]
+        return nodes[::-1]
+
+    def describe(self, node):
+        return {
+            "path": self.path_strings[node],
+            "level": self.levels[node],
+            "title": self.titles[node],
+            "articles": self.count(node),
+            "children": len(self.children[node]),
+        }
@@ -1,28 +1,150 @@
 import re
 from collections import defaultdict
+from .profiler import PipelineProfiler
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+
+def _first_chars(items):
+    # Characters a parsed pattern can start with, or None when unknown.
+    for op, av in items:
+        op = str(op)
+        if op == "AT":
+            continue
+        if op == "LITERAL":
+            return {chr(av)}
+        if op == "IN":
+            chars = set()
+            for item_op, item_av in av:
+                if str(item_op) == "LITERAL":
+                    chars.add(chr(item_av))
+                elif str(item_op) == "RANGE" and item_av[1] - item_av[0] < 256:
+                    chars.update(chr(c) for c in range(item_av[0], item_av[1] + 1))
+                else:
+                    return None
+            return chars
+        if op == "SUBPATTERN":
+            return _first_chars(av[-1])
+        if op == "BRANCH":
+            chars = set()
+            for branch in av[1]:
+                branch_chars = _first_chars(branch)
+                if branch_chars is None:
+                    return None
+                chars |= branch_chars
+            return chars
+        if op in ("MAX_REPEAT", "MIN_REPEAT") and av[0] >= 1:
+            return _first_chars(av[2])
+        return None
+    return None
+
+
+def _scan_guard(patterns):
+    # A leading character class lets the regex engine skip most positions
+    # quickly instead of trying every alternative everywhere.
+    chars = set()
+    for pattern in patterns:
+        try:
+            pattern_chars = _first_chars(sre_parse.parse(pattern, re.M))
+        except Exception:
+            pattern_chars = None
+        if not pattern_chars:
+            return ""
+        chars |= pattern_chars
+    return "(?=[" + "".join(re.escape(c) for c in sorted(chars)) + "])"
+
 
 class HierarchyParser:
-    def __init__(self, hierarchy_patterns, level_keys, article_pattern):
+    def __init__(self, hierarchy_patterns, level_keys, article_pattern, profiler=None):
         self.patterns = hierarchy_patterns
         self.level_keys = level_keys
         self.article_pattern = article_pattern
+        self.profiler = profiler or PipelineProfiler()
+        # Matches of the article pattern and of each hierarchy pattern.
+        self.article_matches = 0
+        self.match_counts = [0] * len(hierarchy_patterns)
+        # Every pattern sits in a lookahead so that matches of different levels
+        # may overlap, exactly as when each pattern is searched on its own.
+        alternatives = [f"(?P<article>{article_pattern})"]
+        alternatives += [f"(?P<level{idx}>{pattern})" for idx, pattern in enumerate(hierarchy_patterns)]
+        guard = _scan_guard([article_pattern] + hierarchy_patterns)
+        self.scanner = re.compile(guard + "(?=" + "|".join(alternatives) + ")", flags=re.M)
 
     def split_by_articles(self, text):
         articles_splits = re.split(self.article_pattern, text, flags=re.M)
+        self.article_matches += len(articles_splits) // 2
         return articles_splits[1::2], articles_splits[2::2], articles_splits[0::2]
 
+    def _apply_heading(self, curr_hierarchy, prev_hierarchy, curr_idx, new_val):
+        if curr_hierarchy[self.level_keys[curr_idx]] != new_val:
+            curr_hierarchy[self.level_keys[curr_idx]] = new_val
+            for lower_idx in range(curr_idx + 1, len(self.level_keys)):
+                if (curr_hierarchy[self.level_keys[lower_idx]]) == prev_hierarchy[self.level_keys[lower_idx]]:
+                    curr_hierarchy[self.level_keys[lower_idx]] = ""
+
     def detect_hierarchy(self, preceding_text, prev_hierarchy):
         curr_hierarchy = prev_hierarchy.copy()
         for idx, pattern in enumerate(reversed(self.patterns)):
             splt = re.split(pattern, preceding_text, flags=re.M)
             if len(splt) > 1:
+                self.match_counts[len(self.patterns) - idx - 1] += (len(splt) - 1) // (re.compile(pattern, re.M).groups + 1)
                 new_val = f"{splt[-2].strip()} {splt[-1].strip()}".strip()
                 preceding_text = "".join(s for s in splt[:-2])
                 # print(new_val)
                 curr_idx = len(self.level_keys) - idx - 1
-                if curr_hierarchy[self.level_keys[curr_idx]] != new_val:
-                    curr_hierarchy[self.level_keys[curr_idx]] = new_val
-                    for lower_idx in range(curr_idx + 1, len(self.level_keys)):
-                        if (curr_hierarchy[self.level_keys[lower_idx]]) == prev_hierarchy[self.level_keys[lower_idx]]:
-                            curr_hierarchy[self.level_keys[lower_idx]] = ""
-        return curr_hierarchy
\ No newline at end of file
+                self._apply_heading(curr_hierarchy, prev_hierarchy, curr_idx, new_val)
+        return curr_hierarchy
+
+    def _hierarchy_from_spans(self, text, chunk_end, level_spans, prev_hierarchy):
+        # Same rules as detect_hierarchy, on heading spans already found by the
+        # scanner: deepest level first, each level only looks before the
+        # heading chosen for the level below it.
+        curr_hierarchy = prev_hierarchy.copy()
+        cut = chunk_end
+        for curr_idx in reversed(range(len(self.patterns))):
+            for start, end in reversed(level_spans[curr_idx]):
+                if start < cut:
+                    end = min(end, cut)
+                    new_val = f"{text[start:end].strip()} {text[end:cut].strip()}".strip()
+                    cut = start
+                    self._apply_heading(curr_hierarchy, prev_hierarchy, curr_idx, new_val)
+                    break
+        return curr_hierarchy
+
+    def iter_articles(self, text):
+        """Yield (article_id, content, hierarchy) for each article in one scan of the text.
+
+        Produces the same results as split_by_articles followed by
+        detect_hierarchy on each preceding text, without materialising the splits.
+        """
+        level_spans = [[] for _ in self.patterns]
+        prev_hierarchy = {lvl: "" for lvl in self.level_keys}
+        chunk_start = 0
+        pending = None
+        for match in self.scanner.finditer(text):
+            name = match.lastgroup
+            start, end = match.span(name)
+            if start < chunk_start:
+                continue
+            if name == "article":
+                self.article_matches += 1
+                with self.profiler.stage("hierarchy"):
+                    curr_hierarchy = self._hierarchy_from_spans(text, start, level_spans, prev_hierarchy)
+                if pending is not None:
+                    yield pending[0], text[chunk_start:start], pending[1]
+                pending = (match.group(name), curr_hierarchy)
+                prev_hierarchy = curr_hierarchy
+                chunk_start = end
+                level_spans = [[] for _ in self.patterns]
+            else:
+                level = int(name[len("level"):])
+                self.match_counts[level] += 1
+                spans = level_spans[level]
+                # re.split only sees non-overlapping matches of a pattern.
+                if not spans or start >= spans[-1][1]:
+                    spans.append((start, end))
+        if pending is not None:
+            yield pending[0], text[chunk_start:], pending[1]
@@ -0,0 +1,62 @@
+from array import array
+from collections import Counter
+import numpy as np
+
+
+class KeywordScorer:
+    """Two-pass TF-IDF keyword ranking over a whole corpus.
+
+    Pass one (`add`) stores each document's candidate counts as CSR arrays of
+    integer term ids, so memory grows with the number of distinct terms per
+    document rather than with the text. Pass two (`top_keywords`) computes
+    document frequencies over the full corpus and scores every document in a
+    single vectorized step, so results do not depend on document order.
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.terms = []
+        self.indices = array("l")
+        self.counts = array("l")
+        self.indptr = array("l", [0])
+        self.lengths = array("l")
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, candidates):
+        # Counter keeps first-occurrence order, which breaks score ties.
+        row = Counter(candidates)
+        vocabulary = self.vocabulary
+        for word in row:
+            if word not in vocabulary:
+                vocabulary[word] = len(self.terms)
+                self.terms.append(word)
+        self.indices.extend(map(vocabulary.__getitem__, row))
+        self.counts.extend(row.values())
+        self.indptr.append(len(self.indices))
+        self.lengths.append(len(candidates))
+
+    def top_keywords(self, top_n=5):
+        num_docs = len(self.lengths)
+        keywords = [[] for _ in range(num_docs)]
+        if not self.indices:
+            return keywords
+
+        indices = np.asarray(self.indices, dtype=np.int64)
+        counts = np.asarray(self.counts, dtype=np.float64)
+        indptr = np.asarray(self.indptr, dtype=np.int64)
+        rows = np.repeat(np.arange(num_docs), np.diff(indptr))
+
+        doc_freq = np.bincount(indices, minlength=len(self.terms))
+        idf = np.log(num_docs / (doc_freq + 1)) + 1
+        lengths = np.maximum(np.asarray(self.lengths, dtype=np.float64), 1)
+        scores = counts / lengths[rows] * idf[indices]
+
+        # Sort by row, then descending score; ties keep first-occurrence order.
+        order = np.lexsort((np.arange(len(scores)), -scores, rows))
+        rank = np.arange(len(order)) - indptr[rows[order]]
+        kept = order[rank < top_n]
+        for row, term_id in zip(rows[kept].tolist(), indices[kept].tolist()):
+            keywords[row].append(self.terms[term_id])
+        return keywords
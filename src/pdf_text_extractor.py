@@ -1,22 +1,83 @@
+import json
+import math
 import os
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from pypdf import PdfReader
 
+
+def _extract_page_range(pdf_path, start, stop):
+    # Runs in worker processes: each one opens its own reader.
+    reader = PdfReader(pdf_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
 class PdfTextExtractor:
-    def __init__(self, pdf_path, output_txt_path):
+    def __init__(self, pdf_path, output_txt_path, workers=1):
         self.pdf_path = pdf_path
         self.output_txt_path = output_txt_path
+        self.pages_path = os.path.splitext(output_txt_path)[0] + ".pages.json"
+        self.workers = workers or os.cpu_count() or 1
+        self.page_offsets = None
+
+    def _extract_pages(self):
+        num_pages = len(PdfReader(self.pdf_path).pages)
+        if self.workers <= 1 or num_pages < 2:
+            return _extract_page_range(self.pdf_path, 0, num_pages)
+
+        # A couple of chunks per worker evens out pages of uneven density.
+        chunk_size = math.ceil(num_pages / (self.workers * 2))
+        bounds = [(start, min(start + chunk_size, num_pages)) for start in range(0, num_pages, chunk_size)]
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(_extract_page_range, self.pdf_path, start, stop) for start, stop in bounds]
+            return [page for future in futures for page in future.result()]
+
+    def invalidate(self):
+        for path in (self.output_txt_path, self.pages_path):
+            if os.path.exists(path):
+                os.remove(path)
 
     def extract_text(self):
         if not os.path.exists(self.output_txt_path):
-            reader = PdfReader(self.pdf_path)
-            text = ""
-            for page in reader.pages:
-                content = page.extract_text()
+            parts = []
+            self.page_offsets = []
+            offset = 0
+            for content in self._extract_pages():
+                self.page_offsets.append(offset)
                 if content:
-                    text += content + "\n"
+                    parts.append(content + "\n")
+                    offset += len(content) + 1
+            text = "".join(parts)
             with open(self.output_txt_path, "w", encoding="utf-8") as f:
                 f.write(text)
+            with open(self.pages_path, "w", encoding="utf-8") as f:
+                json.dump(self.page_offsets, f)
         else:
             with open(self.output_txt_path, "r", encoding="utf-8") as f:
                 text = f.read()
-        return text
\ No newline at end of file
+            if os.path.exists(self.pages_path):
+                with open(self.pages_path, "r", encoding="utf-8") as f:
+                    self.page_offsets = json.load(f)
+        return text
+
+
+class PageLocator:
+    """Maps article headings back to the 1-based PDF page they start on.
+
+    Headings are looked up in the raw extracted text in document order, so
+    each lookup resumes where the previous one stopped.
+    """
+
+    def __init__(self, raw_text, page_offsets):
+        self.raw_text = raw_text
+        self.page_offsets = page_offsets
+        self.cursor = 0
+
+    def locate(self, heading):
+        if not self.page_offsets:
+            return None
+        position = self.raw_text.find(heading, self.cursor)
+        if position < 0:
+            return None
+        self.cursor = position + len(heading)
+        return bisect_right(self.page_offsets, position)
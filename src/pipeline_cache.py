@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+
+
+def content_hash(*parts):
+    """Stable sha256 over strings, bytes and JSON-serialisable config values."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, bytes):
+            data = part
+        elif isinstance(part, str):
+            data = part.encode("utf-8")
+        else:
+            data = json.dumps(part, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PipelineCache:
+    """Content-addressed artifacts for the processing pipeline.
+
+    Each stage keeps a single pickled artifact together with the hash of the
+    inputs that produced it; per-article analyses live in a SQLite table keyed
+    by the hash of the article text.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(cache_dir, "cache.sqlite"))
+        self.db.execute("CREATE TABLE IF NOT EXISTS stages (stage TEXT PRIMARY KEY, key TEXT NOT NULL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS articles (key TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        self.hits = 0
+        self.misses = 0
+
+    def _stage_path(self, stage):
+        return os.path.join(self.cache_dir, f"{stage}.pkl")
+
+    def stage_key(self, stage):
+        row = self.db.execute("SELECT key FROM stages WHERE stage = ?", (stage,)).fetchone()
+        return row[0] if row else None
+
+    def set_stage_key(self, stage, key):
+        self.db.execute("INSERT OR REPLACE INTO stages (stage, key) VALUES (?, ?)", (stage, key))
+        self.db.commit()
+
+    def load_stage(self, stage, key):
+        path = self._stage_path(stage)
+        if self.stage_key(stage) != key or not os.path.exists(path):
+            return None
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def save_stage(self, stage, key, value):
+        path = self._stage_path(stage)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        self.set_stage_key(stage, key)
+
+    def iter_stream(self, stage, key):
+        """Records of a streamed stage, or None when it is missing or stale."""
+        path = self._stage_path(stage)
+        if self.stage_key(stage) != key or not os.path.exists(path):
+            return None
+
+        def records():
+            with open(path, "rb") as f:
+                while True:
+                    try:
+                        yield pickle.load(f)
+                    except EOFError:
+                        return
+        return records()
+
+    def stream_writer(self, stage):
+        return StageStreamWriter(self, stage, self._stage_path(stage))
+
+    def get_article(self, key):
+        row = self.db.execute("SELECT value FROM articles WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def put_article(self, key, value):
+        self.db.execute(
+            "INSERT OR REPLACE INTO articles (key, value) VALUES (?, ?)",
+            (key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        )
+
+    def prune_articles(self, keep_keys):
+        # Drop analyses of articles that no longer exist in the current release.
+        self.db.execute("CREATE TEMP TABLE IF NOT EXISTS keep (key TEXT PRIMARY KEY)")
+        self.db.execute("DELETE FROM keep")
+        self.db.executemany("INSERT OR IGNORE INTO keep (key) VALUES (?)", ((key,) for key in keep_keys))
+        self.db.execute("DELETE FROM articles WHERE key NOT IN (SELECT key FROM keep)")
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+class StageStreamWriter:
+    """Appends pickled records one at a time; the stage only becomes visible on commit."""
+
+    def __init__(self, cache, stage, path):
+        self.cache = cache
+        self.stage = stage
+        self.path = path
+        self.file = open(path + ".tmp", "wb")
+
+    def write(self, record):
+        pickle.dump(record, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def commit(self, key):
+        self.file.close()
+        os.replace(self.path + ".tmp", self.path)
+        self.cache.set_stage_key(self.stage, key)
+
+    def abort(self):
+        if not self.file.closed:
+            self.file.close()
+            os.remove(self.path + ".tmp")
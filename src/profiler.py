@@ -0,0 +1,224 @@
+import bisect
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def profile_paths(data_path, backend="cprofile"):
+    """Return the JSON report and profiler dump files of a code's output."""
+    stem = os.path.splitext(data_path)[0]
+    return stem + ".profile.json", stem + (".profile.html" if backend == "pyinstrument" else ".prof")
+
+
+def run_profiled(func, backend, dump_path):
+    """Call func under cProfile (pstats dump) or pyinstrument (HTML report) and return its result."""
+    if backend == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("pyinstrument is not installed, run: pip install pyinstrument")
+        profiler = Profiler()
+        profiler.start()
+        try:
+            return func()
+        finally:
+            profiler.stop()
+            with open(dump_path, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+    if backend != "cprofile":
+        raise ValueError(f"Unknown profiler: {backend}")
+    import cProfile
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(dump_path)
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS.
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+class PipelineProfiler:
+    """Wall time, call counts and peak memory of the pipeline stages.
+
+    Stages nest: the time of a stage excludes the stages entered inside it,
+    so the stage times add up to the time spent in stages. The same goes for
+    peak_rss_growth_mb, how much the process's peak memory rose during the
+    stage (the peak never goes down, so it is only raised by one stage). Stages may also be
+    entered from inside a generator (see iter_stage), in which case the time
+    its consumer spends between items is not counted.
+    """
+
+    def __init__(self, slowest=20):
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+        self.regex_matches = {}
+        self.slowest = slowest
+        self.articles = []
+        # Why the run did nothing, e.g. its outputs were up to date.
+        self.skipped = None
+        self._recorded = 0
+        self._stack = []
+
+    def _stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = {"seconds": 0.0, "calls": 0, "peak_rss_growth_mb": None}
+        return stage
+
+    @contextmanager
+    def stage(self, name):
+        # Each frame is [start, seconds spent in nested stages, peak RSS at
+        # the start, peak RSS growth in nested stages].
+        frame = [time.perf_counter(), 0.0, peak_rss_mb(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - frame[0]
+            growth = None if frame[2] is None else peak_rss_mb() - frame[2]
+            self._stack.pop()
+            if self._stack:
+                self._stack[-1][1] += elapsed
+                self._stack[-1][3] += growth or 0.0
+            stage = self._stage(name)
+            stage["seconds"] += elapsed - frame[1]
+            stage["calls"] += 1
+            if growth is not None:
+                stage["peak_rss_growth_mb"] = (stage["peak_rss_growth_mb"] or 0.0) + growth - frame[3]
+
+    def iter_stage(self, name, iterable):
+        """Yield from iterable, counting the time taken to produce each item as stage name."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def mark_cached(self, name):
+        self._stage(name)["cached"] = True
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_regex(self, group, patterns, counts):
+        self.regex_matches[group] = [
+            {"pattern": pattern, "matches": count} for pattern, count in zip(patterns, counts)
+        ]
+
+    def record_article(self, article_id, seconds):
+        # A min-heap of the slowest articles; the counter breaks ties.
+        self._recorded += 1
+        entry = (seconds, -self._recorded, article_id)
+        if len(self.articles) < self.slowest:
+            heapq.heappush(self.articles, entry)
+        elif seconds > self.articles[0][0]:
+            heapq.heapreplace(self.articles, entry)
+
+    def report(self):
+        total = time.perf_counter() - self.start
+        stages = {
+            name: dict(stage, seconds=round(stage["seconds"], 6),
+                       peak_rss_growth_mb=None if stage["peak_rss_growth_mb"] is None
+                       else round(stage["peak_rss_growth_mb"], 3),
+                       share=round(stage["seconds"] / total, 4) if total else 0.0)
+            for name, stage in self.stages.items()
+        }
+        return {
+            "skipped": self.skipped,
+            "total_seconds": round(total, 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+            "counters": dict(self.counters),
+            "regex_matches": self.regex_matches,
+            "slowest_articles": [
+                {"article_id": article_id, "seconds": round(seconds, 6)}
+                for seconds, _, article_id in sorted(self.articles, reverse=True)
+            ],
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+    def summary(self):
+        """One line per stage, slowest first."""
+        report = self.report()
+        lines = [f"  skipped: {self.skipped}"] if self.skipped else []
+        for name, stage in sorted(report["stages"].items(), key=lambda item: -item[1]["seconds"]):
+            cached = " (cached)" if stage.get("cached") else ""
+            lines.append(f"  {name:24} {stage['seconds']:8.3f} s {stage['share']:6.1%}{cached}")
+        return "\n".join(lines)
+
+
+# Upper bounds of the latency buckets in milliseconds, roughly x2 apart.
+LATENCY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class LatencyHistogram:
+    """Bucketed latencies of one operation, with percentiles estimated from the buckets."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def observe(self, ms, error=False):
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+            self.total += 1
+            self.sum_ms += ms
+            self.max_ms = max(self.max_ms, ms)
+            self.errors += error
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (max for the overflow bucket)."""
+        if not self.total:
+            return None
+        rank = q / 100 * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                bound = min(self.buckets[i], self.max_ms) if i < len(self.buckets) else self.max_ms
+                return round(bound, 3)
+        return round(self.max_ms, 3)
+
+    def describe(self):
+        with self.lock:
+            return {
+                "calls": self.total,
+                "errors": self.errors,
+                "mean_ms": round(self.sum_ms / self.total, 3) if self.total else None,
+                "p50_ms": self.percentile(50),
+                "p95_ms": self.percentile(95),
+                "p99_ms": self.percentile(99),
+                "max_ms": round(self.max_ms, 3),
+                "buckets_ms": {
+                    (f"<={bound}" if i < len(self.buckets) else f">{self.buckets[-1]}"): count
+                    for i, (bound, count) in enumerate(zip(self.buckets + [None], self.counts)) if count
+                },
+            }
@@ -0,0 +1,50 @@
+import threading
+import time
+from collections import OrderedDict
+from .french import fold
+
+
+def normalize_query(query):
+    """Accent and case folded query with collapsed whitespace, as used for cache keys."""
+    return " ".join(fold(query).split())
+
+
+class QueryCache:
+    """LRU cache of search results whose entries also expire after ttl seconds.
+
+    Keys should include the signature of the data files the results came
+    from, so that results of a replaced file are never served.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (time.monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
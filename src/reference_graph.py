@@ -0,0 +1,166 @@
+import os
+from collections import defaultdict
+import numpy as np
+
+GRAPH_SUFFIX = ".graph.npz"
+
+
+def graph_path_for(data_path):
+    """The graph sidecar shared by the JSON and packed outputs of a code."""
+    return os.path.splitext(data_path)[0] + GRAPH_SUFFIX
+
+
+def _transpose(indptr, indices, num_nodes):
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int32), np.diff(indptr))
+    order = np.lexsort((sources, indices))
+    t_indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=num_nodes), out=t_indptr[1:])
+    return t_indptr, sources[order]
+
+
+class ReferenceGraph:
+    """Citations between the articles of one code as CSR adjacency arrays.
+
+    Nodes are article positions in the output; an edge goes from the citing
+    article to the cited one. The transposed arrays give the citing articles
+    of each node, and PageRank is computed once when the graph is built.
+    """
+
+    def __init__(self, out_indptr, out_indices, in_indptr, in_indices, pagerank):
+        self.out_indptr = out_indptr
+        self.out_indices = out_indices
+        self.in_indptr = in_indptr
+        self.in_indices = in_indices
+        self.pagerank = pagerank
+        self.num_nodes = len(out_indptr) - 1
+
+    @classmethod
+    def build(cls, article_ids, references):
+        """Build the graph from each article's list of referenced article ids.
+
+        A reference to an id shared by several articles links to all of them,
+        like referenced_by in the JSON output; references to articles outside
+        the code are dropped.
+        """
+        docs_by_id = defaultdict(list)
+        for doc, article_id in enumerate(article_ids):
+            docs_by_id[article_id].append(doc)
+        indptr = [0]
+        indices = []
+        for doc, refs in enumerate(references):
+            targets = {target for ref in refs for target in docs_by_id.get(ref, ()) if target != doc}
+            indices.extend(sorted(targets))
+            indptr.append(len(indices))
+        num_nodes = len(indptr) - 1
+        out_indptr = np.array(indptr, dtype=np.int64)
+        out_indices = np.array(indices, dtype=np.int32)
+        in_indptr, in_indices = _transpose(out_indptr, out_indices, num_nodes)
+        pagerank = cls._pagerank(out_indptr, out_indices, num_nodes)
+        return cls(out_indptr, out_indices, in_indptr, in_indices, pagerank)
+
+    @staticmethod
+    def _pagerank(indptr, indices, num_nodes, damping=0.85, tol=1e-10, max_iter=100):
+        if num_nodes == 0:
+            return np.zeros(0)
+        out_degree = np.diff(indptr)
+        sources = np.repeat(np.arange(num_nodes), out_degree)
+        weights = 1.0 / out_degree[sources]
+        dangling = out_degree == 0
+        rank = np.full(num_nodes, 1.0 / num_nodes)
+        for _ in range(max_iter):
+            spread = np.bincount(indices, weights=rank[sources] * weights, minlength=num_nodes)
+            # Articles citing nothing spread their rank over every article.
+            new_rank = (1 - damping) / num_nodes + damping * (spread + rank[dangling].sum() / num_nodes)
+            converged = np.abs(new_rank - rank).sum() < tol
+            rank = new_rank
+            if converged:
+                break
+        return rank
+
+    def save(self, path):
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f, out_indptr=self.out_indptr, out_indices=self.out_indices,
+                in_indptr=self.in_indptr, in_indices=self.in_indices, pagerank=self.pagerank
+            )
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["out_indptr"], data["out_indices"], data["in_indptr"], data["in_indices"], data["pagerank"])
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.out_indptr, self.out_indices, self.in_indptr, self.in_indices, self.pagerank))
+
+    def cited(self, doc):
+        return self.out_indices[self.out_indptr[doc]:self.out_indptr[doc + 1]]
+
+    def citing(self, doc):
+        return self.in_indices[self.in_indptr[doc]:self.in_indptr[doc + 1]]
+
+    def in_degree(self):
+        return np.diff(self.in_indptr)
+
+    def _adjacency(self, direction):
+        if direction == "out":
+            return [(self.out_indptr, self.out_indices)]
+        if direction == "in":
+            return [(self.in_indptr, self.in_indices)]
+        if direction == "both":
+            return [(self.out_indptr, self.out_indices), (self.in_indptr, self.in_indices)]
+        raise ValueError(f"Unknown direction: {direction}")
+
+    def neighbours(self, doc, hops=1, direction="both"):
+        """Return {doc: distance} for every article within hops of doc."""
+        adjacency = self._adjacency(direction)
+        distances = {doc: 0}
+        frontier = [doc]
+        for hop in range(1, hops + 1):
+            parts = [indices[indptr[d]:indptr[d + 1]] for indptr, indices in adjacency for d in frontier]
+            if not parts:
+                break
+            frontier = [d for d in np.unique(np.concatenate(parts)).tolist() if d not in distances]
+            for d in frontier:
+                distances[d] = hop
+        del distances[doc]
+        return distances
+
+    def shortest_path(self, source, target, directed=True, max_hops=None):
+        """Return the docs on a shortest citation path from source to target, or None."""
+        if source == target:
+            return [source]
+        adjacency = self._adjacency("out" if directed else "both")
+        parents = np.full(self.num_nodes, -1, dtype=np.int64)
+        parents[source] = source
+        frontier = [source]
+        hops = 0
+        while frontier and (max_hops is None or hops < max_hops):
+            hops += 1
+            next_frontier = []
+            for d in frontier:
+                for indptr, indices in adjacency:
+                    for n in indices[indptr[d]:indptr[d + 1]].tolist():
+                        if parents[n] >= 0:
+                            continue
+                        parents[n] = d
+                        if n == target:
+                            path = [n]
+                            while path[-1] != source:
+                                path.append(int(parents[path[-1]]))
+                            return path[::-1]
+                        next_frontier.append(n)
+            frontier = next_frontier
+        return None
+
+    def most_cited(self, limit=10, by="in_degree"):
+        """Return (doc, score) pairs for the top articles by in-degree or PageRank."""
+        if by == "in_degree":
+            scores = self.in_degree()
+        elif by == "pagerank":
+            scores = self.pagerank
+        else:
+            raise ValueError(f"Unknown ranking: {by}")
+        top = np.argsort(-scores, kind="stable")[:limit]
+        return [(int(doc), scores[doc].item()) for doc in top]
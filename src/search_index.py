@@ -0,0 +1,201 @@
+import bisect
+import heapq
+import math
+import re
+from collections import defaultdict, namedtuple
+from .french import FOLDED_STOP_WORDS, TOKEN_RE, analyze, fold, light_stem
+
+ARTICLE_ID_RE = re.compile(r"\b(?:([a-z])(\*?\s?\.?\s?))?(\d+(?:-\d+)+)\b")
+ID_KEY_RE = re.compile(r"[a-z]?\d+(?:-\d*)*")
+WORD_RE = re.compile(r"\w+")
+# Shorter numbers are mostly pieces of article ids and alinea numbers ("113-2"
+# gives "113" and "2"); they match ids through the id index, not through BM25.
+MIN_NUMBER_CHARS = 4
+# Nearly every article says "article"; alone it would rank articles by how
+# often they cite others.
+SEARCH_STOP_TERMS = frozenset(["article"])
+
+# Ranking tiers: article id matches first, then the articles citing them,
+# then exact phrases, then plain BM25.
+TIER_ID, TIER_CITATION, TIER_PHRASE, TIER_TERMS = 3, 2, 1, 0
+
+SearchHit = namedtuple("SearchHit", ["doc", "tier", "score"])
+
+
+def normalize_article_id(text):
+    key = re.sub(r"[\s.*]", "", fold(text))
+    return key[len("article"):] if key.startswith("article") else key
+
+
+def index_terms(text):
+    """analyze() without "article" and the short numbers, which would match unrelated articles."""
+    return [
+        (position, term) for position, term in analyze(text)
+        if term not in SEARCH_STOP_TERMS and (len(term) >= MIN_NUMBER_CHARS or not term.isdigit())
+    ]
+
+
+def highlight_snippet(content, query, max_chars=200, marker="**"):
+    """Return an excerpt of about max_chars around the first query term in content.
+
+    Words matching a query term (after folding and plural stripping) are
+    wrapped in marker; without a match the excerpt starts the content.
+    """
+    terms = {term for _, term in analyze(query)}
+    matches = [
+        match for match in WORD_RE.finditer(content)
+        if any(light_stem(token) in terms for token in TOKEN_RE.findall(fold(match.group())))
+    ]
+    start = 0
+    if matches:
+        # Centre the window on the first match, without going past either end.
+        start = max(0, min(matches[0].start() - max_chars // 3, len(content) - max_chars))
+        space = content.rfind(" ", 0, start + 1)
+        start = space + 1 if start and space >= 0 else start
+    end = min(len(content), start + max_chars)
+    if end < len(content):
+        space = content.rfind(" ", start, end)
+        end = space if space > start else end
+
+    pieces = []
+    cursor = start
+    for match in matches:
+        if match.start() < start:
+            continue
+        if match.end() > end:
+            break
+        pieces += [content[cursor:match.start()], marker, match.group(), marker]
+        cursor = match.end()
+    pieces.append(content[cursor:end])
+    return ("…" if start else "") + "".join(pieces) + ("…" if end < len(content) else "")
+
+
+class SearchIndex:
+    """Positional inverted index with BM25 ranking over article contents.
+
+    Documents are identified by their position in the article list the index
+    was built from. When the references of each article are given, a query
+    naming an article id also finds the articles citing it.
+    """
+
+    def __init__(self, article_ids, contents, k1=1.2, b=0.75, references=None):
+        self.k1 = k1
+        self.b = b
+        postings = defaultdict(lambda: defaultdict(list))
+        doc_lengths = []
+        for doc, content in enumerate(contents):
+            terms = index_terms(content)
+            doc_lengths.append(len(terms))
+            for position, term in terms:
+                postings[term][doc].append(position)
+        self.postings = {term: dict(docs) for term, docs in postings.items()}
+        self.num_docs = len(doc_lengths)
+        avg_length = sum(doc_lengths) / self.num_docs if self.num_docs else 1.0
+        # BM25 length normalisation only depends on the document, so compute it once.
+        self.length_norms = [k1 * (1 - b + b * length / (avg_length or 1.0)) for length in doc_lengths]
+
+        self.id_index = defaultdict(list)
+        for doc, article_id in enumerate(article_ids):
+            self.id_index[normalize_article_id(article_id)].append(doc)
+        self.sorted_ids = sorted(self.id_index)
+
+        self.citing = defaultdict(list)
+        for doc, cited_ids in enumerate(references or []):
+            for key in dict.fromkeys(normalize_article_id(article_id) for article_id in cited_ids):
+                self.citing[key].append(doc)
+
+    def written_ids(self, query):
+        """Return the normalized article ids written in the query."""
+        keys = []
+        for match in ARTICLE_ID_RE.finditer(fold(query)):
+            prefix, separator, number = match.groups()
+            key = normalize_article_id((prefix or "") + number)
+            if (key not in self.id_index and key not in self.citing
+                    and prefix in FOLDED_STOP_WORDS and separator.isspace()):
+                # "à 121-7" is the word "a" before the id 121-7, not the id A121-7.
+                key = number
+            keys.append(key)
+        return keys
+
+    def lookup_ids(self, query):
+        """Return docs whose article id appears in, equals, or starts with the query."""
+        docs = []
+        for key in self.written_ids(query):
+            docs.extend(self.id_index.get(key, []))
+        key = normalize_article_id(query)
+        if ID_KEY_RE.fullmatch(key):
+            i = bisect.bisect_left(self.sorted_ids, key)
+            while i < len(self.sorted_ids) and self.sorted_ids[i].startswith(key):
+                docs.extend(self.id_index[self.sorted_ids[i]])
+                i += 1
+        return docs
+
+    def bm25_scores(self, terms):
+        scores = defaultdict(float)
+        for term in set(terms):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            df = len(docs)
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            for doc, positions in docs.items():
+                tf = len(positions)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + self.length_norms[doc])
+        return scores
+
+    def phrase_matches(self, query_terms):
+        """Return docs containing the query terms at the same relative positions."""
+        if len(query_terms) < 2:
+            return set()
+        start = query_terms[0][0]
+        offsets = [(position - start, term) for position, term in query_terms]
+        if any(term not in self.postings for _, term in offsets):
+            return set()
+        # Intersect from the rarest term to keep candidate sets small.
+        by_rarity = sorted(offsets, key=lambda item: len(self.postings[item[1]]))
+        candidates = set(self.postings[by_rarity[0][1]])
+        for _, term in by_rarity[1:]:
+            candidates.intersection_update(self.postings[term])
+            if not candidates:
+                return set()
+
+        matches = set()
+        for doc in candidates:
+            anchors = self.postings[offsets[0][1]][doc]
+            others = [(offset, set(self.postings[term][doc])) for offset, term in offsets[1:]]
+            if any(all(anchor + offset in positions for offset, positions in others) for anchor in anchors):
+                matches.add(doc)
+        return matches
+
+    def search(self, query, max_results=10):
+        """Rank documents for a query and return at most max_results SearchHits."""
+        hits = []
+        seen = set()
+        for doc in self.lookup_ids(query):
+            if doc not in seen:
+                seen.add(doc)
+                hits.append(SearchHit(doc, TIER_ID, 0.0))
+        if len(hits) >= max_results:
+            return hits[:max_results]
+
+        query_terms = index_terms(query)
+        scores = self.bm25_scores(term for _, term in query_terms)
+        citing = [doc for key in self.written_ids(query) for doc in self.citing.get(key, [])]
+        # Citing articles also sharing the other query terms first.
+        for doc in sorted(dict.fromkeys(citing), key=lambda doc: -scores.get(doc, 0.0)):
+            if doc not in seen:
+                seen.add(doc)
+                hits.append(SearchHit(doc, TIER_CITATION, scores.get(doc, 0.0)))
+        if len(hits) >= max_results or not query_terms:
+            return hits[:max_results]
+        phrases = self.phrase_matches(query_terms)
+        ranked = heapq.nlargest(
+            max_results - len(hits) + len(seen),
+            scores,
+            key=lambda doc: (doc in phrases, scores[doc])
+        )
+        for doc in ranked:
+            if doc not in seen:
+                seen.add(doc)
+                hits.append(SearchHit(doc, TIER_PHRASE if doc in phrases else TIER_TERMS, scores[doc]))
+        return hits[:max_results]
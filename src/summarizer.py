@@ -0,0 +1,127 @@
+import asyncio
+import os
+import sqlite3
+import time
+from .pipeline_cache import content_hash
+
+SUMMARY_PROMPT = (
+    "Provide a concise summary of the following French code article in about 100 characters in French. "
+    "Focus on key legal obligations and procedures, using precise legal terminology:\n\n"
+    "{content}"
+)
+
+
+class SummaryCache:
+    """Persistent summaries keyed by (model, prompt template, content hash).
+
+    Codes processed in parallel processes share the cache file, so each
+    summary is committed on its own (a few ms next to an LLM call) and the
+    database is in WAL mode, where readers never wait for the writer.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=timeout)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL)")
+
+    @staticmethod
+    def key(model, prompt_template, content):
+        return content_hash(model, prompt_template, content_hash(content))
+
+    def get(self, key):
+        row = self.db.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, summary):
+        self.db.execute("INSERT OR REPLACE INTO summaries (key, summary) VALUES (?, ?)", (key, summary))
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+
+class Summarizer:
+    """Summarizes articles concurrently through the LLM's async API.
+
+    At most `concurrency` requests are in flight; failed requests are retried
+    with exponential backoff and leave an empty summary once retries run out.
+    """
+
+    def __init__(self, llm, model, cache_path, concurrency=4, retries=3, retry_delay=1.0,
+                 prompt_template=SUMMARY_PROMPT):
+        self.llm = llm
+        self.model = model
+        self.cache_path = cache_path
+        self.concurrency = concurrency
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.prompt_template = prompt_template
+        self.stats = {}
+
+    async def _complete(self, semaphore, content):
+        prompt = self.prompt_template.format(content=content)
+        for attempt in range(self.retries + 1):
+            try:
+                async with semaphore:
+                    response = await self.llm.acomplete(prompt)
+                return str(response).strip()
+            except Exception as e:
+                if attempt == self.retries:
+                    print(f"Summary failed after {attempt + 1} attempts: {e}")
+                    return None
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+
+    async def _summarize_all(self, articles, cache):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending = {}
+        cached = 0
+        for article in articles:
+            if not article["content"]:
+                continue
+            key = SummaryCache.key(self.model, self.prompt_template, article["content"])
+            summary = cache.get(key)
+            if summary is not None:
+                article["summary"] = summary
+                cached += 1
+            else:
+                # Identical contents are only sent once.
+                pending.setdefault(key, []).append(article)
+
+        async def run(key, group):
+            summary = await self._complete(semaphore, group[0]["content"])
+            if summary is None:
+                return False
+            cache.put(key, summary)
+            for article in group:
+                article["summary"] = summary
+            return True
+
+        results = await asyncio.gather(*(run(key, group) for key, group in pending.items()))
+        return cached, len(pending), results.count(False)
+
+    def summarize(self, articles):
+        """Fill the summary field of every article in place and return run statistics."""
+        cache = SummaryCache(self.cache_path)
+        start = time.perf_counter()
+        try:
+            cached, requested, failed = asyncio.run(self._summarize_all(articles, cache))
+        finally:
+            cache.close()
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "articles": len(articles),
+            "requested": requested,
+            "cached": cached,
+            "failed": failed,
+            "seconds": elapsed,
+            "articles_per_second": requested / elapsed if elapsed > 0 else 0.0,
+        }
+        print(
+            f"Summaries: {requested} requested ({failed} failed), {cached} from cache, "
+            f"{self.stats['articles_per_second']:.2f} articles/s"
+        )
+        return self.stats
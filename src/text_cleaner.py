@@ -3,8 +3,10 @@ import re
 class TextCleaner:
     def __init__(self, cleaning_patterns):
         self.cleaning_patterns = cleaning_patterns
+        # Substitutions made by each pattern in the last clean_text call.
+        self.match_counts = [0] * len(cleaning_patterns)
 
     def clean_text(self, text):
-        for pattern in self.cleaning_patterns:
-            text = re.sub(pattern, '', text)
+        for idx, pattern in enumerate(self.cleaning_patterns):
+            text, self.match_counts[idx] = re.subn(pattern, '', text)
         return text.strip()
\ No newline at end of file